@@ -0,0 +1,103 @@
+"""CPU cost per response body, FastAPI's default path vs the fast path.
+
+Needs no database, the users are built in memory:
+
+    python -m benchmarks.bench_serialization --list-size 1000
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.api.schemas import UserListResponse, UserShowResponse
+from src.api.serialization import render
+from src.config import settings
+from src.db.models import PortalRole, UserEntity
+
+
+def _build_users(count: int) -> list[UserEntity]:
+    return [
+        UserEntity(
+            user_id=uuid4(),
+            name="Ivan",
+            surname="Ivanov",
+            email=f"ivan{index}@kek.com",
+            is_active=True,
+            hashed_password="SampleHashedPass",
+            roles=[PortalRole.USER],
+        )
+        for index in range(count)
+    ]
+
+
+async def _fastapi_body(field, content, response_class) -> bytes:
+    serialized = await serialize_response(
+        field=field, response_content=content
+    )
+    return response_class(serialized).body
+
+
+async def _render_body(schema, content) -> bytes:
+    return render(schema, content).body
+
+
+async def _measure(render_body, iterations: int) -> float:
+    for _ in range(min(iterations, 100)):
+        await render_body()
+
+    started_at = time.process_time()
+    for _ in range(iterations):
+        await render_body()
+    return (time.process_time() - started_at) / iterations * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.APP_FAST_JSON = True
+    user = _build_users(1)[0]
+    users = UserListResponse(users=_build_users(args.list_size))
+
+    cases = (
+        ("single user", UserShowResponse, user, args.iterations),
+        (
+            f"list of {args.list_size}",
+            UserListResponse,
+            users,
+            max(args.iterations // args.list_size, 100),
+        ),
+    )
+    for name, schema, content, iterations in cases:
+        field = create_model_field(name="Response", type_=schema)
+        results = {
+            "stdlib json": await _measure(
+                lambda field=field, content=content: _fastapi_body(
+                    field, content, JSONResponse
+                ),
+                iterations,
+            ),
+            "orjson": await _measure(
+                lambda field=field, content=content: _fastapi_body(
+                    field, content, ORJSONResponse
+                ),
+                iterations,
+            ),
+            "render": await _measure(
+                lambda schema=schema, content=content: _render_body(
+                    schema, content
+                ),
+                iterations,
+            ),
+        }
+        for path, cpu_us in results.items():
+            print(f"{name:16} {path:12} {cpu_us:10.1f} us cpu per response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--list-size", type=int, default=1_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""CPU cost per user lookup, before and after the cached statements.
+
+Runs against the test database from ``.env``:
+
+    python -m benchmarks.bench_user_lookup --iterations 5000
+    python -m benchmarks.bench_user_lookup --prepared-statement-cache-size 0
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.schemas import UserGetByEmailRequest
+from src.config import settings
+from src.db.dals import UserDAL
+from src.db.models import BaseEntity, PortalRole, UserEntity
+
+
+async def _filter_by_lookup(session, email):
+    filters = UserGetByEmailRequest(email=email).model_dump()
+    result = await session.execute(select(UserEntity).filter_by(**filters))
+    return result.scalar_one_or_none()
+
+
+async def _cached_lookup(session, email):
+    return await UserDAL(session).get_user_by_email(email)
+
+
+async def _measure(session_maker, lookup, email, iterations) -> dict:
+    async with session_maker() as session:
+        for _ in range(100):
+            await lookup(session, email)
+            session.expunge_all()
+
+        cpu_started_at = time.process_time()
+        wall_started_at = time.perf_counter()
+        for _ in range(iterations):
+            await lookup(session, email)
+            session.expunge_all()
+        cpu = time.process_time() - cpu_started_at
+        wall = time.perf_counter() - wall_started_at
+
+    return {
+        "cpu_us_per_lookup": cpu / iterations * 1e6,
+        "wall_us_per_lookup": wall / iterations * 1e6,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(
+        settings.TEST_DATABASE_URL,
+        connect_args={
+            "prepared_statement_cache_size": (
+                args.prepared_statement_cache_size
+            )
+        },
+    )
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    email = f"bench-{uuid4().hex[:8]}@example.com"
+
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseEntity.metadata.create_all)
+    async with session_maker.begin() as session:
+        session.add(
+            UserEntity(
+                name="Bench",
+                surname="Lookup",
+                email=email,
+                hashed_password="SampleHashPassword",
+                roles=[PortalRole.USER],
+            )
+        )
+
+    try:
+        for name, lookup in (
+            ("filter_by", _filter_by_lookup),
+            ("lambda_stmt", _cached_lookup),
+        ):
+            result = await _measure(
+                session_maker, lookup, email, args.iterations
+            )
+            print(
+                f"{name:12} cpu {result['cpu_us_per_lookup']:8.1f} us"
+                f"  wall {result['wall_us_per_lookup']:8.1f} us"
+            )
+    finally:
+        async with session_maker.begin() as session:
+            await session.execute(
+                delete(UserEntity).where(UserEntity.email == email)
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5_000)
+    parser.add_argument(
+        "--prepared-statement-cache-size", type=int, default=100
+    )
+    asyncio.run(main(parser.parse_args()))
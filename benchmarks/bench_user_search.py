@@ -0,0 +1,189 @@
+"""Latency of ``UserDAL.search_users`` over a seeded million-row table.
+
+Seeds ``--rows`` users into the test database from ``.env`` (server-side,
+with ``generate_series``), builds the model's search indexes plus the
+pg_trgm ones from the search migration when the extension is available,
+and replays searches for prefixes of seeded surnames and emails:
+
+    python -m benchmarks.bench_user_search --rows 1000000 --budget-ms 50
+    python -m benchmarks.bench_user_search --keep   # reuse seeded rows
+
+Exits with status 1 when the p95 latency is over ``--budget-ms``.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.schemas import USER_SEARCH_MIN_LENGTH
+from src.config import settings
+from src.db.dals import UserDAL
+from src.db.models import BaseEntity, UserEntity
+
+EMAIL_DOMAIN = "search-bench.example"
+
+SEED_USERS = text(
+    f"""
+    INSERT INTO users (
+        user_id, name, surname, email, is_active, hashed_password, roles
+    )
+    SELECT
+        gen_random_uuid(),
+        (ARRAY['Ivan', 'Anna', 'Oleg', 'Maria', 'Petr', 'Olga', 'Nikolai',
+               'Elena', 'Sergei', 'Irina'])[1 + g % 10],
+        (ARRAY['Ivanov', 'Petrov', 'Sidorov', 'Smirnov', 'Kuznetsov',
+               'Popov', 'Vasiliev', 'Sokolov', 'Mikhailov', 'Novikov'])
+            [1 + (g / 10) % 10] || substr(md5(g::text), 1, 6),
+        'u' || g || '.' || substr(md5(g::text), 7, 8) || '@{EMAIL_DOMAIN}',
+        g % 20 <> 0,
+        'SampleHashPassword',
+        ARRAY['USER']
+    FROM generate_series(:start, :stop - 1) AS g
+    """
+)
+
+
+async def _seeded_count(engine) -> int:
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            text("SELECT count(*) FROM users WHERE email LIKE :pattern"),
+            {"pattern": f"%@{EMAIL_DOMAIN}"},
+        )
+        return result.scalar()
+
+
+def _create_schema(connection) -> None:
+    BaseEntity.metadata.create_all(connection)
+    # create_all skips the indexes of a table that already exists, such as
+    # one kept from a run before the search indexes changed.
+    for index in UserEntity.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+async def _seed_users(engine, rows: int, batch_size: int) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(_create_schema)
+
+    seeded = await _seeded_count(engine)
+    for start in range(seeded, rows, batch_size):
+        async with engine.begin() as connection:
+            await connection.execute(
+                SEED_USERS,
+                {"start": start, "stop": min(start + batch_size, rows)},
+            )
+        print(f"seeded {min(start + batch_size, rows)} / {rows}", end="\r")
+    if seeded < rows:
+        print()
+
+    async with engine.connect() as connection:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        available = (
+            await connection.execute(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_available_extensions "
+                    "WHERE name = 'pg_trgm')"
+                )
+            )
+        ).scalar()
+        if available:
+            await connection.execute(
+                text("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            )
+            for column in ("name", "surname", "email"):
+                await connection.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_users_trgm_{column} "
+                        f"ON users USING gin (lower({column}) gin_trgm_ops)"
+                    )
+                )
+        else:
+            print("pg_trgm is not available, searching without indexes")
+        await connection.execute(text("ANALYZE users"))
+
+
+async def _sample_terms(engine, count: int) -> list[str]:
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            text(
+                "SELECT surname, email FROM users "
+                "TABLESAMPLE SYSTEM (1) WHERE email LIKE :pattern LIMIT :n"
+            ),
+            {"pattern": f"%@{EMAIL_DOMAIN}", "n": count},
+        )
+        rows = result.all()
+
+    terms = []
+    for surname, email in rows:
+        value = random.choice((surname, email.split("@")[0]))
+        length = random.randint(USER_SEARCH_MIN_LENGTH, min(len(value), 10))
+        terms.append(value[:length])
+    return terms
+
+
+async def _cleanup_users(engine) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("DELETE FROM users WHERE email LIKE :pattern"),
+            {"pattern": f"%@{EMAIL_DOMAIN}"},
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = create_async_engine(args.database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    await _seed_users(engine, args.rows, args.batch_size)
+
+    try:
+        terms = await _sample_terms(engine, args.queries)
+        latencies = []
+        async with session_maker() as session:
+            user_dal = UserDAL(session)
+            fuzzy = await user_dal.has_trigram_support()
+            for term in terms[:10]:
+                await user_dal.search_users(term, limit=21, fuzzy=fuzzy)
+            for term in terms:
+                started_at = time.perf_counter()
+                await user_dal.search_users(term, limit=21, fuzzy=fuzzy)
+                latencies.append(time.perf_counter() - started_at)
+                session.expunge_all()
+    finally:
+        if not args.keep:
+            await _cleanup_users(engine)
+        await engine.dispose()
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    p95_ms = quantiles[94] * 1e3
+    print(
+        f"{len(latencies)} searches over {args.rows} rows (fuzzy={fuzzy})"
+        f"  p50 {quantiles[49] * 1e3:.2f} ms"
+        f"  p95 {p95_ms:.2f} ms"
+        f"  p99 {quantiles[98] * 1e3:.2f} ms"
+    )
+    if p95_ms > args.budget_ms:
+        print(f"p95 is over the {args.budget_ms} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Leave the seeded rows in place for the next run.",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
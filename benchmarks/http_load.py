@@ -0,0 +1,288 @@
+"""End-to-end HTTP load for the user endpoints.
+
+Seeds ``--users`` accounts in the test database from ``.env`` (the
+``test_db`` service in ``docker-compose.yaml``) and drives every route
+through ``main.app`` in-process, or through a running server with
+``--base-url``:
+
+    python -m benchmarks.http_load --users 500 --concurrency 50
+    python -m benchmarks.http_load --output baseline.json
+
+Each phase sends one request per seeded user, so ``DELETE /user/`` runs
+last and removes the accounts it measured.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+from uuid import UUID, uuid4
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.config import settings
+from src.db.models import BaseEntity, PortalRole, UserEntity
+from src.utils import PasswordHasher
+
+PASSWORD = "BenchPassword1"
+
+
+class BenchUser:
+    def __init__(self, user_id: UUID, email: str):
+        self.user_id = user_id
+        self.email = email
+        self.headers: dict[str, str] = {}
+
+
+async def _seed_users(engine, count: int, run_id: str) -> list[BenchUser]:
+    hashed_password = PasswordHasher.get_password_hash(PASSWORD)
+    users = [
+        BenchUser(uuid4(), f"bench-{run_id}-{index}@example.com")
+        for index in range(count)
+    ]
+
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseEntity.metadata.create_all)
+        await connection.execute(
+            insert(UserEntity),
+            [
+                {
+                    "user_id": user.user_id,
+                    "name": "Bench",
+                    "surname": "User",
+                    "email": user.email,
+                    "is_active": True,
+                    "hashed_password": hashed_password,
+                    "roles": [PortalRole.USER],
+                }
+                for user in users
+            ],
+        )
+    return users
+
+
+async def _cleanup_users(engine, run_id: str) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(
+            delete(UserEntity).where(
+                UserEntity.email.like(f"bench-{run_id}-%")
+            )
+        )
+
+
+async def _login(client: AsyncClient, user: BenchUser) -> Response:
+    response = await client.post(
+        "/login/token", data={"username": user.email, "password": PASSWORD}
+    )
+    if response.status_code == 200:
+        token = response.json()["access_token"]
+        user.headers = {"Authorization": f"Bearer {token}"}
+    return response
+
+
+async def _get_user(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get(
+        "/user/", params={"user_id": str(user.user_id)}, headers=user.headers
+    )
+
+
+async def _get_user_by_email(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get(
+        "/user/by-email", params={"email": user.email}, headers=user.headers
+    )
+
+
+async def _update_user(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.patch(
+        "/user/",
+        params={"user_id": str(user.user_id)},
+        json={"name": "Benched"},
+        headers=user.headers,
+    )
+
+
+async def _delete_user(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.delete(
+        "/user/", params={"user_id": str(user.user_id)}, headers=user.headers
+    )
+
+
+PHASES: tuple[
+    tuple[str, Callable[[AsyncClient, BenchUser], Awaitable[Response]]],
+    ...,
+] = (
+    ("POST /login/token", _login),
+    ("GET /user/", _get_user),
+    ("GET /user/by-email", _get_user_by_email),
+    ("PATCH /user/", _update_user),
+    ("DELETE /user/", _delete_user),
+)
+
+
+def _percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[
+        percent - 1
+    ]
+
+
+async def _run_phase(
+    client: AsyncClient,
+    users: list[BenchUser],
+    request: Callable[[AsyncClient, BenchUser], Awaitable[Response]],
+    concurrency: int,
+) -> dict:
+    latencies: list[float] = []
+    status_codes: Counter[int] = Counter()
+    queue: asyncio.Queue[BenchUser] = asyncio.Queue()
+    for user in users:
+        queue.put_nowait(user)
+
+    async def worker() -> None:
+        while not queue.empty():
+            user = queue.get_nowait()
+            started_at = time.perf_counter()
+            response = await request(client, user)
+            latencies.append(time.perf_counter() - started_at)
+            status_codes[response.status_code] += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *(worker() for _ in range(min(concurrency, len(users))))
+    )
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "requests": len(latencies),
+        "errors": sum(
+            amount for code, amount in status_codes.items() if code >= 400
+        ),
+        "status_codes": {
+            str(code): amount for code, amount in sorted(status_codes.items())
+        },
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1e3, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1e3, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1e3, 2),
+    }
+
+
+def _create_client(args: argparse.Namespace, engine) -> AsyncClient:
+    if args.base_url:
+        return AsyncClient(base_url=args.base_url, timeout=args.timeout)
+
+    from main import app
+    from src.db.database import get_db_read_session, get_db_session
+    from src.throttling import TokenBucketLimiter, login_throttle
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def _override_db_session():
+        async with session_maker() as session:
+            yield session
+            if session.in_transaction():
+                await session.commit()
+
+    app.dependency_overrides[get_db_session] = _override_db_session
+    app.dependency_overrides[get_db_read_session] = _override_db_session
+    # Every simulated client shares one address in-process.
+    login_throttle.by_ip = TokenBucketLimiter(0, 1, 0)
+    return AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://bench",
+        timeout=args.timeout,
+    )
+
+
+def _get_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(
+        args.database_url,
+        pool_size=min(args.concurrency, settings.DB_POOL_SIZE * 4),
+        max_overflow=0,
+    )
+    started_at = datetime.now(timezone.utc)
+    run_id = uuid4().hex[:8]
+    users = await _seed_users(engine, args.users, run_id)
+    results = {}
+
+    try:
+        async with _create_client(args, engine) as client:
+            for name, request in PHASES:
+                results[name] = await _run_phase(
+                    client, users, request, args.concurrency
+                )
+                print(
+                    f"{name:22} {results[name]['rps']:9.1f} rps"
+                    f"  p50 {results[name]['p50_ms']:8.2f} ms"
+                    f"  p95 {results[name]['p95_ms']:8.2f} ms"
+                    f"  p99 {results[name]['p99_ms']:8.2f} ms"
+                    f"  errors {results[name]['errors']}"
+                )
+    finally:
+        await _cleanup_users(engine, run_id)
+        await engine.dispose()
+        PasswordHasher.shutdown()
+
+    return {
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "routes": results,
+    }
+
+
+def _write_report(path: str, report: dict) -> None:
+    # Runs after the event loop is gone so file and git I/O cannot stall
+    # in-flight requests.
+    report = {"revision": _get_revision(), **report}
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--base-url",
+        help=(
+            "Target a running server instead of main.app in-process; "
+            "start it with LOGIN_ATTEMPTS_PER_IP=0."
+        ),
+    )
+    parser.add_argument(
+        "--database-url",
+        default=settings.TEST_DATABASE_URL,
+        help="Database to seed; must be the one the target server uses.",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="http_load.json")
+    args = parser.parse_args()
+    _write_report(args.output, asyncio.run(main(args)))
@@ -1,12 +1,33 @@
-import uvicorn
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
 
 from src.api.handlers import user_router
 from src.api.login_handler import login_router
+from src.api.serialization import get_default_response_class
 from src.api.service import service_router
-from src.config import settings
+from src.db.database import replica_set
+from src.db.instrumentation import QueryBudgetMiddleware
+from src.metrics import MetricsMiddleware
+from src.server import run
+from src.utils import PasswordHasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    PasswordHasher.calibrate()
+    yield
+    PasswordHasher.shutdown()
+    await replica_set.dispose()
+
 
-app = FastAPI(title="eduportal")
+app = FastAPI(
+    title="eduportal",
+    lifespan=lifespan,
+    default_response_class=get_default_response_class(),
+)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 main_api_router = APIRouter()
 main_api_router.include_router(user_router, prefix="/user", tags=["user"])
@@ -17,4 +38,4 @@ app.include_router(main_api_router)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=settings.APP_PORT)
+    run(app)
@@ -1,26 +1,45 @@
+import hashlib
+from datetime import timedelta
+from uuid import UUID
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.schemas import UserGetByEmailRequest
+from src.api.schemas import Principal, Token, TokenTypeEnum
+from src.cache import principal_cache, token_cache
 from src.config import auth_settings
-from src.db.dals import UserDAL
+from src.db.dals import RefreshTokenDAL, UserDAL
 from src.db.database import get_db_session
-from src.db.models import UserEntity
+from src.db.models import PortalRole, UserEntity
+from src.security import (
+    REFRESH_TOKEN_TYPE,
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    hash_token_id,
+)
 from src.utils import PasswordHasher
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
+# Expired refresh token rows deleted whenever a token is issued.
+REFRESH_TOKEN_PRUNE_BATCH = 100
+
+CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+)
+
 
 async def _get_user_by_email_for_auth(
     email: str, session: AsyncSession
 ) -> UserEntity:
     async with session.begin():
         user_dal = UserDAL(session)
-        filter = UserGetByEmailRequest(email=email)
-        filter_dict = filter.model_dump()
-        return await user_dal.get_user(filter_dict)
+        return await user_dal.get_user_by_email(email)
 
 
 async def authenticate_user(
@@ -30,30 +49,149 @@ async def authenticate_user(
 ) -> UserEntity | None:
     if not (user := await _get_user_by_email_for_auth(email, db)):
         return
-    if not PasswordHasher.verify_password(password, user.hashed_password):
+    is_valid, new_hash = await PasswordHasher.averify_and_update(
+        password, user.hashed_password
+    )
+    if not is_valid:
         return
+    if new_hash is not None:
+        await _rehash_user_password(user, new_hash, db)
     return user
 
 
-async def get_current_user_from_token(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db_session),
-) -> UserEntity:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+async def _rehash_user_password(
+    user: UserEntity, new_hash: str, session: AsyncSession
+) -> None:
+    async with session.begin():
+        user_dal = UserDAL(session)
+        if await user_dal.update_password_hash(
+            user.user_id, user.hashed_password, new_hash
+        ):
+            user.hashed_password = new_hash
+
+
+def build_token_claims(user: UserEntity) -> dict:
+    claims = {"sub": user.email}
+    if auth_settings.AUTH_STATELESS_TOKENS:
+        claims.update(
+            {
+                "uid": str(user.user_id),
+                "rol": [PortalRole(role).value for role in user.roles],
+                "act": user.is_active,
+            }
+        )
+    return claims
+
+
+async def create_token_pair(user: UserEntity, session: AsyncSession) -> Token:
+    async with session.begin():
+        return await _issue_token_pair(user, session)
+
+
+async def _issue_token_pair(user: UserEntity, session: AsyncSession) -> Token:
+    refresh_token, token_hash, expires_at = create_refresh_token(user.user_id)
+    refresh_token_dal = RefreshTokenDAL(session)
+    # Used and revoked rows are only needed until they expire; pruning a
+    # few on every issue keeps the table at roughly the live sessions.
+    await refresh_token_dal.delete_expired_tokens(REFRESH_TOKEN_PRUNE_BATCH)
+    await refresh_token_dal.create_token(token_hash, user.user_id, expires_at)
+    return Token(
+        access_token=create_access_token(
+            data=build_token_claims(user),
+            expires_delta=timedelta(
+                minutes=auth_settings.ACCESS_TOKEN_EXPIRE_MINUTES
+            ),
+        ),
+        token_type=TokenTypeEnum.BEARER,
+        refresh_token=refresh_token,
     )
 
+
+async def rotate_refresh_token(
+    refresh_token: str, session: AsyncSession
+) -> Token:
     try:
-        payload = jwt.decode(
-            token,
-            auth_settings.SECRET_KEY,
-            algorithms=[auth_settings.ALGORITHM],
+        payload = decode_access_token(refresh_token)
+    except JWTError:
+        raise CREDENTIALS_EXCEPTION
+    if payload.get("typ") != REFRESH_TOKEN_TYPE or not payload.get("jti"):
+        raise CREDENTIALS_EXCEPTION
+
+    token = None
+    async with session.begin():
+        # The engine default is AUTOCOMMIT; the old token must stay
+        # usable if issuing its successor fails.
+        await session.connection(
+            execution_options={"isolation_level": "READ COMMITTED"}
         )
-        if not (email := payload.get("sub")):
-            raise credentials_exception
-        if not (user := await _get_user_by_email_for_auth(email, db)):
-            raise credentials_exception
-        return user
+        refresh_token_dal = RefreshTokenDAL(session)
+        row = await refresh_token_dal.use_token(hash_token_id(payload["jti"]))
+        if row is not None and row.used_user_id is None:
+            # A used or revoked token came back: either the client or an
+            # attacker holds a stolen copy, so end every session.
+            await refresh_token_dal.revoke_user_tokens(row.user_id)
+        elif row is not None:
+            user = await UserDAL(session).get_user_by_id(row.used_user_id)
+            if user is not None and user.is_active:
+                token = await _issue_token_pair(user, session)
+
+    if token is None:
+        raise CREDENTIALS_EXCEPTION
+    return token
+
+
+async def revoke_refresh_tokens(user_id: UUID, session: AsyncSession) -> int:
+    async with session.begin():
+        refresh_token_dal = RefreshTokenDAL(session)
+        return await refresh_token_dal.revoke_user_tokens(user_id)
+
+
+def _decode_token(token: str) -> dict:
+    # Clients reuse a token for its whole lifetime, so the verified
+    # payload is kept until exp instead of re-checking the signature on
+    # every request.
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    if payload := token_cache.get(cache_key):
+        return payload
+
+    try:
+        payload = decode_access_token(token)
     except JWTError:
-        raise credentials_exception
+        raise CREDENTIALS_EXCEPTION
+    if not payload.get("sub") or payload.get("typ") == REFRESH_TOKEN_TYPE:
+        raise CREDENTIALS_EXCEPTION
+    if isinstance(expires_at := payload.get("exp"), (int, float)):
+        token_cache.set(cache_key, payload, expires_at)
+    return payload
+
+
+async def _get_user_by_token_subject(
+    email: str, session: AsyncSession
+) -> UserEntity:
+    if user := principal_cache.get(email):
+        return user
+    if not (user := await _get_user_by_email_for_auth(email, session)):
+        raise CREDENTIALS_EXCEPTION
+    principal_cache.set(email, user)
+    return user
+
+
+async def get_current_principal_from_token(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db_session),
+) -> Principal:
+    payload = _decode_token(token)
+
+    if auth_settings.AUTH_STATELESS_TOKENS and "uid" in payload:
+        try:
+            return Principal(
+                user_id=payload["uid"],
+                email=payload["sub"],
+                roles=payload.get("rol", []),
+                is_active=payload.get("act", True),
+            )
+        except ValidationError:
+            raise CREDENTIALS_EXCEPTION
+
+    user = await _get_user_by_token_subject(payload["sub"], db)
+    return Principal.model_validate(user)
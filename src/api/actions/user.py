@@ -1,102 +1,523 @@
-from typing import List
-from uuid import UUID
+import csv
+import io
+import json
+from typing import Any, AsyncIterator
+from uuid import UUID, uuid4
 
-from fastapi import HTTPException
-from pydantic import BaseModel
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.schemas import (
+    USER_BATCH_CHUNK_SIZE,
+    USER_BATCH_MAX_BYTES,
+    USER_BATCH_MAX_ROWS,
+    Principal,
+    UserBatchCreateResponse,
+    UserBatchRowResult,
+    UserBatchRowStatus,
+    UserCountMode,
     UserCreate,
+    UserExportFormat,
+    UserExportRequest,
     UserGetByEmailRequest,
-    UserGetByIdRequest,
+    UserListRequest,
+    UserListResponse,
+    UserRoleBatchResponse,
+    UserRoleBatchResult,
+    UserRoleBatchStatus,
+    UserSearchRequest,
 )
-from src.db.dals import UserDAL
-from src.db.models import PortalRole, UserEntity
-from src.utils import PasswordHasher
+from src.config import settings
+from src.db.dals import RefreshTokenDAL, UserDAL, manageable_by
+from src.db.database import SessionScope
+from src.db.models import ROLE_MASKS, PortalRole, UserEntity
+from src.utils import (
+    PasswordHasher,
+    PasswordHasherBusyError,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 async def _create_new_user(
     body: UserCreate, session: AsyncSession
 ) -> UserEntity:
+    hashed_password = await PasswordHasher.ahash_password(body.password)
     async with session.begin():
         user_dal = UserDAL(session)
         new_user = await user_dal.create_user(
             name=body.name,
             surname=body.surname,
             email=body.email,
-            hashed_password=PasswordHasher.get_password_hash(body.password),
+            hashed_password=hashed_password,
             roles=[PortalRole.USER],
         )
         return new_user
 
 
-async def _get_user(body: BaseModel, session: AsyncSession) -> UserEntity:
+async def _iter_batch_body(request: Request) -> AsyncIterator[bytes]:
+    # Content-Length rejects declared oversize bodies before any work;
+    # counting covers chunked uploads. An NDJSON stream cut off here
+    # keeps the chunks already inserted.
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Batch is limited to {USER_BATCH_MAX_BYTES} bytes",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > USER_BATCH_MAX_BYTES:
+        raise too_large
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > USER_BATCH_MAX_BYTES:
+            raise too_large
+        yield chunk
+
+
+async def _iter_batch_rows(request: Request) -> AsyncIterator[Any]:
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = bytearray()
+        async for chunk in _iter_batch_body(request):
+            buffer += chunk
+            # Long lines arrive over many chunks; only split once one ends.
+            if b"\n" not in chunk:
+                continue
+            *lines, rest = buffer.split(b"\n")
+            buffer = bytearray(rest)
+            for line in lines:
+                if line.strip():
+                    yield bytes(line)
+        if buffer.strip():
+            yield bytes(buffer)
+        return
+
+    body = b"".join([chunk async for chunk in _iter_batch_body(request)])
+    try:
+        rows = json.loads(body)
+    except json.JSONDecodeError as err:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON: {err}")
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=422, detail="Request body should be a JSON array"
+        )
+    if len(rows) > USER_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch is limited to {USER_BATCH_MAX_ROWS} rows",
+        )
+    for row in rows:
+        yield row
+
+
+def _validate_batch_row(
+    index: int, row: Any
+) -> UserCreate | UserBatchRowResult:
+    try:
+        if isinstance(row, bytes):
+            row = json.loads(row)
+        return UserCreate.model_validate(row)
+    except json.JSONDecodeError as err:
+        detail = f"Invalid JSON: {err}"
+    except ValidationError as err:
+        detail = json.loads(err.json(include_url=False))
+    except HTTPException as err:
+        detail = err.detail
+
+    email = row.get("email") if isinstance(row, dict) else None
+    return UserBatchRowResult(
+        index=index,
+        status=UserBatchRowStatus.INVALID,
+        email=email if isinstance(email, str) else None,
+        detail=detail,
+    )
+
+
+async def _insert_users_chunk(
+    chunk: list[tuple[int, UserCreate]], session: AsyncSession
+) -> list[UserBatchRowResult]:
+    try:
+        hashed_passwords = await PasswordHasher.ahash_many(
+            [body.password for _, body in chunk]
+        )
+    except PasswordHasherBusyError as err:
+        return [
+            UserBatchRowResult(
+                index=index,
+                status=UserBatchRowStatus.FAILED,
+                email=body.email,
+                detail=str(err),
+            )
+            for index, body in chunk
+        ]
+
     async with session.begin():
         user_dal = UserDAL(session)
-        filters = body.model_dump()
-        user = await user_dal.get_user(filters)
-        return user
+        created_user_ids = await user_dal.create_users(
+            [
+                {
+                    "user_id": uuid4(),
+                    "name": body.name,
+                    "surname": body.surname,
+                    "email": body.email,
+                    "is_active": True,
+                    "hashed_password": hashed_password,
+                    "roles": [PortalRole.USER],
+                }
+                for (_, body), hashed_password in zip(chunk, hashed_passwords)
+            ]
+        )
+
+    results = []
+    for index, body in chunk:
+        if (user_id := created_user_ids.pop(body.email, None)) is not None:
+            results.append(
+                UserBatchRowResult(
+                    index=index,
+                    status=UserBatchRowStatus.CREATED,
+                    email=body.email,
+                    user_id=user_id,
+                )
+            )
+        else:
+            results.append(
+                UserBatchRowResult(
+                    index=index,
+                    status=UserBatchRowStatus.DUPLICATE,
+                    email=body.email,
+                    detail="User with this email already exists.",
+                )
+            )
+    return results
+
+
+async def _create_users_batch(
+    rows: AsyncIterator[Any], session: AsyncSession
+) -> UserBatchCreateResponse:
+    results = []
+    chunk = []
+    index = 0
+
+    async for row in rows:
+        if index >= USER_BATCH_MAX_ROWS:
+            results.append(
+                UserBatchRowResult(
+                    index=index,
+                    status=UserBatchRowStatus.INVALID,
+                    detail=f"Batch is limited to {USER_BATCH_MAX_ROWS} rows",
+                )
+            )
+        else:
+            validated = _validate_batch_row(index, row)
+            if isinstance(validated, UserBatchRowResult):
+                results.append(validated)
+            else:
+                chunk.append((index, validated))
+
+        if len(chunk) >= USER_BATCH_CHUNK_SIZE:
+            results.extend(await _insert_users_chunk(chunk, session))
+            chunk = []
+        index += 1
+
+    if chunk:
+        results.extend(await _insert_users_chunk(chunk, session))
+
+    results.sort(key=lambda result: result.index)
+    return UserBatchCreateResponse(
+        created=sum(
+            result.status == UserBatchRowStatus.CREATED for result in results
+        ),
+        results=results,
+    )
+
+
+def _format_export_rows(
+    rows: list, columns: list[str], export_format: UserExportFormat
+) -> bytes:
+    if export_format == UserExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                ",".join(value) if isinstance(value, list) else value
+                for value in row
+            )
+        return buffer.getvalue().encode()
+
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows
+    ).encode()
+
+
+async def _export_users(
+    body: UserExportRequest,
+    session_scope: SessionScope,
+) -> AsyncIterator[bytes]:
+    if body.format == UserExportFormat.CSV:
+        yield _format_export_rows([body.columns], body.columns, body.format)
+
+    async with session_scope() as session, session.begin():
+        # Server-side cursors need a real transaction, the engine
+        # default is AUTOCOMMIT.
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ"}
+        )
+        user_dal = UserDAL(session)
+        async for rows in user_dal.stream_users(
+            columns=body.columns, is_active=body.is_active, role=body.role
+        ):
+            yield _format_export_rows(rows, body.columns, body.format)
 
 
 async def _get_user_by_email(
-    body: UserGetByEmailRequest, db: AsyncSession
+    body: UserGetByEmailRequest, session: AsyncSession
 ) -> UserEntity:
-    return await _get_user(body, db)
+    async with session.begin():
+        user_dal = UserDAL(session)
+        return await user_dal.get_user_by_email(body.email)
+
+
+async def _get_user_by_id(user_id: UUID, session: AsyncSession) -> UserEntity:
+    async with session.begin():
+        user_dal = UserDAL(session)
+        return await user_dal.get_user_by_id(user_id)
 
 
-async def _get_user_by_id(user_id: UUID, db: AsyncSession) -> UserEntity:
-    body = UserGetByIdRequest(user_id=user_id)
-    body.user_id = str(user_id)
-    return await _get_user(body, db)
+async def _get_users_page(
+    body: UserListRequest, session: AsyncSession
+) -> UserListResponse:
+    after_user_id = decode_cursor(body.cursor) if body.cursor else None
+
+    total = None
+    async with session.begin():
+        user_dal = UserDAL(session)
+        users = await user_dal.get_users_page(
+            limit=body.limit + 1,
+            after_user_id=after_user_id,
+            is_active=body.is_active,
+            role=body.role,
+        )
+        if body.count is not None:
+            total = await _count_users(
+                user_dal, body.count, body.is_active, body.role
+            )
+
+    next_cursor = None
+    if len(users) > body.limit:
+        users = users[: body.limit]
+        next_cursor = encode_cursor(users[-1].user_id)
+    return UserListResponse(users=users, next_cursor=next_cursor, total=total)
 
 
-async def _get_users(session: AsyncSession) -> List[UserEntity]:
+async def _count_users(
+    user_dal: UserDAL,
+    mode: UserCountMode,
+    is_active: bool | None,
+    role: PortalRole | None,
+) -> int:
+    if mode == UserCountMode.ESTIMATED:
+        return await user_dal.estimate_users_count(is_active, role)
+    if mode == UserCountMode.MAINTAINED:
+        return await user_dal.get_maintained_users_count(is_active, role)
+    return await user_dal.count_users(is_active, role)
+
+
+async def _search_users(
+    body: UserSearchRequest, session: AsyncSession
+) -> UserListResponse:
+    after = decode_search_cursor(body.cursor) if body.cursor else None
+
     async with session.begin():
         user_dal = UserDAL(session)
-        users = await user_dal.get_all_users()
-        return users
+        fuzzy = (
+            settings.USER_SEARCH_FUZZY and await user_dal.has_trigram_support()
+        )
+        rows = await user_dal.search_users(
+            term=body.q,
+            limit=body.limit + 1,
+            after=after,
+            is_active=body.is_active,
+            fuzzy=fuzzy,
+        )
+
+    next_cursor = None
+    if len(rows) > body.limit:
+        rows = rows[: body.limit]
+        user, rank = rows[-1]
+        next_cursor = encode_search_cursor(rank, user.user_id)
+    return UserListResponse(
+        users=[user for user, _ in rows], next_cursor=next_cursor
+    )
+
+
+def _get_permission_conditions(
+    target_user_id: UUID, current_user: Principal
+) -> list[ColumnElement]:
+    if target_user_id == current_user.user_id:
+        return []
+    return manageable_by(current_user.roles_mask)
+
+
+def _get_updated_user_id(
+    row: Row | None,
+    user_id: UUID,
+    failed_status_code: int = 403,
+    failed_detail: str = "Forbidden.",
+) -> UUID:
+    if row is None or not row.is_active:
+        raise HTTPException(
+            status_code=404, detail=f"User with id {user_id} not found."
+        )
+    if row.updated_user_id is None:
+        raise HTTPException(
+            status_code=failed_status_code, detail=failed_detail
+        )
+    return row.updated_user_id
 
 
 async def _update_user(
-    user_id: UUID, updated_user_params: dict, session: AsyncSession
-) -> UUID | None:
+    user_id: UUID,
+    updated_user_params: dict,
+    current_user: Principal,
+    session: AsyncSession,
+) -> UUID:
+    async with session.begin():
+        user_dal = UserDAL(session)
+        row = await user_dal.update_user_if(
+            user_id=user_id,
+            values=updated_user_params,
+            conditions=_get_permission_conditions(user_id, current_user),
+        )
+    return _get_updated_user_id(row, user_id, failed_detail="Forbidden")
+
+
+async def _delete_user(
+    user_id: UUID, current_user: Principal, session: AsyncSession
+) -> UUID:
+    if user_id == current_user.user_id and current_user.is_superadmin:
+        raise HTTPException(
+            status_code=406, detail="Superadmin cannot be deleted via API."
+        )
+
     async with session.begin():
+        # The engine default is AUTOCOMMIT; deactivation and revocation
+        # must not be committed one without the other.
+        await session.connection(
+            execution_options={"isolation_level": "READ COMMITTED"}
+        )
         user_dal = UserDAL(session)
-        updated_user_id = await user_dal.update_user(
-            user_id=user_id, values_dict=updated_user_params
+        row = await user_dal.delete_user_if(
+            user_id=user_id,
+            conditions=_get_permission_conditions(user_id, current_user),
         )
-        return updated_user_id
+        if row is not None and row.updated_user_id is not None:
+            await RefreshTokenDAL(session).revoke_user_tokens(user_id)
+    return _get_updated_user_id(row, user_id)
 
 
-async def _delete_user(user_id: UUID, session: AsyncSession) -> UUID | None:
+async def _grant_admin_role(user_id: UUID, session: AsyncSession) -> UUID:
     async with session.begin():
         user_dal = UserDAL(session)
-        deleted_user_id = await user_dal.delete_user(user_id)
-        return deleted_user_id
+        row = await user_dal.add_user_role(
+            user_id=user_id,
+            role=PortalRole.ADMIN,
+            excluded_roles=[PortalRole.ADMIN, PortalRole.SUPERADMIN],
+        )
+    return _get_updated_user_id(
+        row,
+        user_id,
+        failed_status_code=409,
+        failed_detail=(
+            f"User with id {user_id} already promoted to admin / superadmin."
+        ),
+    )
 
 
-def check_user_permissions(
-    target_user: UserEntity, current_user: UserEntity
-) -> bool:
-    if target_user.user_id == current_user.user_id:
-        if PortalRole.SUPERADMIN in current_user.roles:
-            raise HTTPException(
-                status_code=406, detail="Superadmin cannot be deleted via API."
-            )
-        return True
+async def _revoke_admin_role(user_id: UUID, session: AsyncSession) -> UUID:
+    async with session.begin():
+        user_dal = UserDAL(session)
+        row = await user_dal.remove_user_role(
+            user_id=user_id, role=PortalRole.ADMIN
+        )
+    return _get_updated_user_id(
+        row,
+        user_id,
+        failed_status_code=409,
+        failed_detail=f"User with id {user_id} has no admin privileges.",
+    )
+
 
-    if not {PortalRole.ADMIN, PortalRole.SUPERADMIN}.intersection(
-        current_user.roles
-    ):
-        return False
+def _get_role_batch_conditions(current_user: Principal) -> list[ColumnElement]:
+    return [
+        UserEntity.user_id != current_user.user_id,
+        ~UserEntity.has_role(PortalRole.SUPERADMIN),
+    ]
 
-    if PortalRole.ADMIN in current_user.roles:
-        if {PortalRole.SUPERADMIN, PortalRole.ADMIN}.intersection(
-            target_user.roles
+
+def _get_role_batch_response(
+    user_ids: list[UUID],
+    rows: list[Row],
+    current_user: Principal,
+    failed_status: UserRoleBatchStatus,
+) -> UserRoleBatchResponse:
+    rows_by_user_id = {row.user_id: row for row in rows}
+    results = []
+    for user_id in user_ids:
+        row = rows_by_user_id.get(user_id)
+        if row is None or not row.is_active:
+            status = UserRoleBatchStatus.NOT_FOUND
+        elif row.updated_user_id is not None:
+            status = UserRoleBatchStatus.UPDATED
+        elif (
+            user_id == current_user.user_id
+            or row.roles_mask & ROLE_MASKS[PortalRole.SUPERADMIN]
         ):
-            return False
+            status = UserRoleBatchStatus.FORBIDDEN
+        else:
+            status = failed_status
+        results.append(UserRoleBatchResult(user_id=user_id, status=status))
+
+    return UserRoleBatchResponse(
+        updated=sum(
+            result.status == UserRoleBatchStatus.UPDATED for result in results
+        ),
+        results=results,
+    )
+
+
+async def _grant_admin_role_batch(
+    user_ids: list[UUID], current_user: Principal, session: AsyncSession
+) -> UserRoleBatchResponse:
+    user_ids = list(dict.fromkeys(user_ids))
+    async with session.begin():
+        user_dal = UserDAL(session)
+        rows = await user_dal.add_users_role(
+            user_ids=user_ids,
+            role=PortalRole.ADMIN,
+            excluded_roles=[PortalRole.ADMIN, PortalRole.SUPERADMIN],
+            conditions=_get_role_batch_conditions(current_user),
+        )
+    return _get_role_batch_response(
+        user_ids, rows, current_user, UserRoleBatchStatus.ALREADY_ADMIN
+    )
 
-        if PortalRole.ADMIN in target_user.roles:
-            return False
 
-    return True
+async def _revoke_admin_role_batch(
+    user_ids: list[UUID], current_user: Principal, session: AsyncSession
+) -> UserRoleBatchResponse:
+    user_ids = list(dict.fromkeys(user_ids))
+    async with session.begin():
+        user_dal = UserDAL(session)
+        rows = await user_dal.remove_users_role(
+            user_ids=user_ids,
+            role=PortalRole.ADMIN,
+            conditions=_get_role_batch_conditions(current_user),
+        )
+    return _get_role_batch_response(
+        user_ids, rows, current_user, UserRoleBatchStatus.NOT_ADMIN
+    )
@@ -1,50 +1,108 @@
 from logging import getLogger
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.actions.auth import get_current_user_from_token
+from src.api.actions.auth import get_current_principal_from_token
 from src.api.actions.user import (
     _create_new_user,
+    _create_users_batch,
     _delete_user,
+    _export_users,
     _get_user_by_email,
     _get_user_by_id,
+    _get_users_page,
+    _grant_admin_role,
+    _grant_admin_role_batch,
+    _iter_batch_rows,
+    _revoke_admin_role,
+    _revoke_admin_role_batch,
+    _search_users,
     _update_user,
-    check_user_permissions,
 )
 from src.api.schemas import (
+    Principal,
+    UserBatchCreateResponse,
     UserCreate,
     UserDeletedResponse,
+    UserExportFormat,
+    UserExportRequest,
     UserGetByEmailRequest,
+    UserListRequest,
+    UserListResponse,
+    UserRoleBatchRequest,
+    UserRoleBatchResponse,
+    UserSearchRequest,
     UserShowResponse,
     UserUpdatedResponse,
     UserUpdateRequest,
 )
-from src.db.database import get_db_session
-from src.db.models import UserEntity
+from src.api.serialization import render
+from src.db.database import (
+    SessionScope,
+    get_db_read_session,
+    get_db_read_session_scope,
+    get_db_session,
+    mark_primary_reads,
+)
+from src.utils import InvalidCursorError, PasswordHasherBusyError
 
 logger = getLogger(__name__)
 user_router = APIRouter()
 
 
-@user_router.post("/", response_model=UserShowResponse)
+@user_router.post(
+    "/",
+    response_model=UserShowResponse,
+    dependencies=[Depends(mark_primary_reads)],
+)
 async def create_user(
-    body: UserCreate, db: AsyncSession = Depends(get_db_session)
+    body: UserCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db_session),
 ):
     try:
-        return await _create_new_user(body, db)
+        user = await _create_new_user(body, db)
     except IntegrityError as err:
         logger.error(err)
         raise HTTPException(status_code=503, detail=f"Database error: {err}")
+    except PasswordHasherBusyError as err:
+        raise HTTPException(
+            status_code=503, detail=str(err), headers={"Retry-After": "1"}
+        )
+    return render(UserShowResponse, user, response=response)
+
+
+@user_router.post("/batch", dependencies=[Depends(mark_primary_reads)])
+async def create_users_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> UserBatchCreateResponse:
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return await _create_users_batch(_iter_batch_rows(request), db)
 
 
-@user_router.patch("/admin_privilege", response_model=UserUpdatedResponse)
+@user_router.patch(
+    "/admin_privilege",
+    response_model=UserUpdatedResponse,
+    dependencies=[Depends(mark_primary_reads)],
+)
 async def grant_admin_privilege(
     user_id: UUID,
     db: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_principal_from_token),
 ):
     if not current_user.is_superadmin:
         raise HTTPException(status_code=403, detail="Forbidden.")
@@ -53,35 +111,23 @@ async def grant_admin_privilege(
             status_code=400, detail="Cannot manage privileges of itself."
         )
 
-    user_to_promote = await _get_user_by_id(user_id, db)
-
-    if user_to_promote is None:
-        raise HTTPException(
-            status_code=404, detail=f"User with id {user_id} not found."
-        )
-    if user_to_promote.is_admin or user_to_promote.is_superadmin:
-        raise HTTPException(
-            status_code=409,
-            detail=f"User with id {user_id} already promoted to admin / superadmin.",
-        )
-
-    updated_user_params = {
-        "roles": user_to_promote.enrich_admin_roles_by_admin_role()
-    }
-
     try:
-        updated_user_id = await _update_user(user_id, updated_user_params, db)
+        updated_user_id = await _grant_admin_role(user_id, db)
     except IntegrityError as err:
         logger.error(err)
         raise HTTPException(status_code=503, detail=f"Database error: {err}")
     return UserUpdatedResponse(updated_user_id=updated_user_id)
 
 
-@user_router.delete("/admin_privilege", response_model=UserUpdatedResponse)
+@user_router.delete(
+    "/admin_privilege",
+    response_model=UserUpdatedResponse,
+    dependencies=[Depends(mark_primary_reads)],
+)
 async def revoke_admin_privilege(
     user_id: UUID,
     db: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_principal_from_token),
 ):
     if not current_user.is_superadmin:
         raise HTTPException(status_code=403, detail="Forbidden.")
@@ -89,62 +135,131 @@ async def revoke_admin_privilege(
         raise HTTPException(
             status_code=400, detail="Cannot manage privileges of itself."
         )
-    user_for_revoke_admin_privileges = await _get_user_by_id(user_id, db)
 
-    if user_for_revoke_admin_privileges is None:
-        raise HTTPException(
-            status_code=404, detail=f"User with id {user_id} not found."
-        )
-    if not user_for_revoke_admin_privileges.is_admin:
-        raise HTTPException(
-            status_code=409,
-            detail=f"User with id {user_id} has no admin privileges.",
-        )
-
-    updated_user_params = {
-        "roles": user_for_revoke_admin_privileges.remove_admin_privileges_from_model()
-    }
     try:
-        updated_user_id = await _update_user(
-            updated_user_params=updated_user_params,
-            session=db,
-            user_id=user_id,
-        )
+        updated_user_id = await _revoke_admin_role(user_id, db)
     except IntegrityError as err:
         logger.error(err)
         raise HTTPException(status_code=503, detail=f"Database error: {err}")
     return UserUpdatedResponse(updated_user_id=updated_user_id)
 
 
-@user_router.get("/by-email")
+@user_router.patch(
+    "/admin_privilege/batch",
+    dependencies=[Depends(mark_primary_reads)],
+)
+async def grant_admin_privilege_batch(
+    body: UserRoleBatchRequest,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> UserRoleBatchResponse:
+    if not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return await _grant_admin_role_batch(body.user_ids, current_user, db)
+
+
+@user_router.delete(
+    "/admin_privilege/batch",
+    dependencies=[Depends(mark_primary_reads)],
+)
+async def revoke_admin_privilege_batch(
+    body: UserRoleBatchRequest,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> UserRoleBatchResponse:
+    if not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return await _revoke_admin_role_batch(body.user_ids, current_user, db)
+
+
+@user_router.get("/by-email", response_model=UserShowResponse)
 async def get_user_by_email(
     body: UserGetByEmailRequest = Query(...),
-    db_session: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
-) -> UserShowResponse:
-    return await _get_user_by_email(body, db_session)
+    db_session: AsyncSession = Depends(get_db_read_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> Response:
+    user = await _get_user_by_email(body, db_session)
+    if user is None:
+        raise HTTPException(
+            status_code=404, detail=f"User with email {body.email} not found."
+        )
+    return render(UserShowResponse, user)
+
+
+@user_router.get("/list", response_model=UserListResponse)
+async def get_users(
+    body: UserListRequest = Query(...),
+    db_session: AsyncSession = Depends(get_db_read_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> Response:
+    try:
+        users_page = await _get_users_page(body, db_session)
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=422, detail=str(err))
+    return render(UserListResponse, users_page)
+
+
+@user_router.get("/search", response_model=UserListResponse)
+async def search_users(
+    body: UserSearchRequest = Query(...),
+    db_session: AsyncSession = Depends(get_db_read_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> Response:
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
+
+    try:
+        users_page = await _search_users(body, db_session)
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=422, detail=str(err))
+    return render(UserListResponse, users_page)
+
+
+@user_router.get("/export")
+async def export_users(
+    body: UserExportRequest = Query(...),
+    session_scope: SessionScope = Depends(get_db_read_session_scope),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> StreamingResponse:
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
 
+    media_type = (
+        "text/csv"
+        if body.format == UserExportFormat.CSV
+        else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        _export_users(body, session_scope),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=users.{body.format.value}"
+            )
+        },
+    )
 
-@user_router.get("/")
+
+@user_router.get("/", response_model=UserShowResponse)
 async def get_user_by_id(
     user_id: UUID,
-    db_session: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
-) -> UserShowResponse:
+    db_session: AsyncSession = Depends(get_db_read_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> Response:
     user = await _get_user_by_id(user_id, db_session)
     if user is None:
         raise HTTPException(
             status_code=404, detail=f"User with id {user_id} not found."
         )
-    return user
+    return render(UserShowResponse, user)
 
 
-@user_router.patch("/")
+@user_router.patch("/", dependencies=[Depends(mark_primary_reads)])
 async def update_user_by_id(
     user_id: UUID,
     body: UserUpdateRequest,
     db_session: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_principal_from_token),
 ) -> UserUpdatedResponse:
     updated_user_params = body.model_dump(exclude_unset=True)
 
@@ -154,21 +269,9 @@ async def update_user_by_id(
             detail="At least one parameter for user update info should be provided",
         )
 
-    user_to_update = await _get_user_by_id(user_id, db_session)
-    if user_to_update is None:
-        raise HTTPException(
-            status_code=404, detail=f"User with id {user_id} not found."
-        )
-
-    if user_id != current_user.user_id:
-        if check_user_permissions(
-            target_user=user_to_update, current_user=current_user
-        ):
-            raise HTTPException(status_code=403, detail="Forbidden")
-
     try:
         updated_user_id = await _update_user(
-            user_id, updated_user_params, db_session
+            user_id, updated_user_params, current_user, db_session
         )
     except IntegrityError as err:
         logger.error(err)
@@ -176,28 +279,11 @@ async def update_user_by_id(
     return UserUpdatedResponse(updated_user_id=updated_user_id)
 
 
-@user_router.delete("/")
+@user_router.delete("/", dependencies=[Depends(mark_primary_reads)])
 async def delete_user_by_id(
     user_id: UUID,
     db_session: AsyncSession = Depends(get_db_session),
-    current_user: UserEntity = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_principal_from_token),
 ) -> UserDeletedResponse:
-    user_to_delete = await _get_user_by_id(user_id, db_session)
-
-    if user_to_delete is None:
-        raise HTTPException(
-            status_code=404, detail=f"User with id {user_id} not found."
-        )
-
-    if not check_user_permissions(
-        target_user=user_to_delete, current_user=current_user
-    ):
-        raise HTTPException(status_code=403, detail="Forbidden.")
-
-    deleted_user_id = await _delete_user(user_id, db_session)
-    if deleted_user_id is None:
-        raise HTTPException(
-            status_code=404, detail=f"User with id {user_id} not found."
-        )
-
+    deleted_user_id = await _delete_user(user_id, current_user, db_session)
     return UserDeletedResponse(deleted_user_id=deleted_user_id)
@@ -1,38 +1,81 @@
-from datetime import timedelta
+import math
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.actions.auth import authenticate_user
-from src.api.schemas import Token, TokenTypeEnum
-from src.config import auth_settings
+from src.api.actions.auth import (
+    authenticate_user,
+    create_token_pair,
+    get_current_principal_from_token,
+    revoke_refresh_tokens,
+    rotate_refresh_token,
+)
+from src.api.schemas import (
+    Principal,
+    RefreshTokenRequest,
+    RefreshTokensRevokedResponse,
+    Token,
+)
+from src.config import settings
 from src.db.database import get_db_session
-from src.security import create_access_token
+from src.throttling import login_throttle
+from src.utils import PasswordHasherBusyError, get_client_ip
 
 login_router = APIRouter()
 
 
 @login_router.post("/token")
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db_session),
 ) -> Token:
-    if not (
-        user := await authenticate_user(
+    client_ip = get_client_ip(
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for"),
+        settings.APP_TRUSTED_PROXY_NETWORKS,
+    )
+    retry_after = login_throttle.acquire(form_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    try:
+        user = await authenticate_user(
             form_data.username, form_data.password, db
         )
-    ):
+    except PasswordHasherBusyError as err:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(err),
+            headers={"Retry-After": "1"},
+        )
+    if not user:
+        login_throttle.record_failure(form_data.username, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
 
-    access_token_expires = timedelta(
-        minutes=auth_settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    access_token = create_access_token(
-        data={"sub": user.email, "other_custom_data": [1, 2, 3, 4]},
-        expires_delta=access_token_expires,
-    )
-    return Token(access_token=access_token, token_type=TokenTypeEnum.BEARER)
+    login_throttle.record_success(form_data.username, client_ip)
+    return await create_token_pair(user, db)
+
+
+@login_router.post("/refresh")
+async def refresh_access_token(
+    body: RefreshTokenRequest, db: AsyncSession = Depends(get_db_session)
+) -> Token:
+    return await rotate_refresh_token(body.refresh_token, db)
+
+
+@login_router.post("/revoke")
+async def revoke_all_refresh_tokens(
+    db: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal_from_token),
+) -> RefreshTokensRevokedResponse:
+    revoked = await revoke_refresh_tokens(current_user.user_id, db)
+    return RefreshTokensRevokedResponse(revoked=revoked)
@@ -1,13 +1,51 @@
 import re
 import uuid
 from enum import Enum
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
 from fastapi import HTTPException
-from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    StringConstraints,
+    WithJsonSchema,
+    field_validator,
+    model_validator,
+)
+
+from src.db.models import ROLE_MASKS, PortalRole, get_roles_mask
 
 LETTER_MATCH_PATTERN = re.compile(r"^[а-яА-Яa-zA-Z\-]+$")
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Shorter terms yield no trigram to drive the index with.
+USER_SEARCH_MIN_LENGTH = 3
+USER_SEARCH_MAX_LENGTH = 100
+
+USER_BATCH_CHUNK_SIZE = 1_000
+USER_BATCH_MAX_ROWS = 50_000
+# Well above USER_BATCH_MAX_ROWS rows of maximum length fields.
+USER_BATCH_MAX_BYTES = 32 * 1024 * 1024
+USER_ROLE_BATCH_MAX_IDS = 1_000
+
+# Emails are validated on the way in; running the validator again for
+# every user we serialize dominates response CPU.
+StoredEmail = Annotated[
+    str, WithJsonSchema({"type": "string", "format": "email"})
+]
+
+USER_EXPORT_COLUMNS = (
+    "user_id",
+    "name",
+    "surname",
+    "email",
+    "is_active",
+    "roles",
+)
+
 
 class ConfigModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -40,10 +78,123 @@ class UserShowResponse(ConfigModel):
     user_id: uuid.UUID
     name: str
     surname: str
-    email: EmailStr
+    email: StoredEmail
     is_active: bool
 
 
+class Principal(ConfigModel):
+    user_id: uuid.UUID
+    email: str
+    roles: list[PortalRole]
+    roles_mask: int | None = None
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def fill_roles_mask(self):
+        # Stateless tokens only carry the role names.
+        if self.roles_mask is None:
+            self.roles_mask = get_roles_mask(self.roles)
+        return self
+
+    @property
+    def is_superadmin(self) -> bool:
+        return bool(self.roles_mask & ROLE_MASKS[PortalRole.SUPERADMIN])
+
+    @property
+    def is_admin(self) -> bool:
+        return bool(self.roles_mask & ROLE_MASKS[PortalRole.ADMIN])
+
+
+class UserCountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    MAINTAINED = "maintained"
+
+
+class UserListRequest(BaseModel):
+    limit: Annotated[int, Field(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE
+    cursor: str | None = None
+    is_active: bool | None = None
+    role: PortalRole | None = None
+    count: UserCountMode | None = None
+
+
+class UserSearchRequest(BaseModel):
+    q: Annotated[
+        str,
+        StringConstraints(
+            strip_whitespace=True,
+            min_length=USER_SEARCH_MIN_LENGTH,
+            max_length=USER_SEARCH_MAX_LENGTH,
+        ),
+    ]
+    limit: Annotated[int, Field(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE
+    cursor: str | None = None
+    is_active: bool | None = None
+
+
+class UserListResponse(BaseModel):
+    users: list[UserShowResponse]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class UserExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class UserExportRequest(BaseModel):
+    format: UserExportFormat = UserExportFormat.NDJSON
+    columns: list[Literal[USER_EXPORT_COLUMNS]] = list(USER_EXPORT_COLUMNS)
+    is_active: bool | None = None
+    role: PortalRole | None = None
+
+
+class UserBatchRowStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+
+class UserBatchRowResult(BaseModel):
+    index: int
+    status: UserBatchRowStatus
+    email: str | None = None
+    user_id: uuid.UUID | None = None
+    detail: Any = None
+
+
+class UserBatchCreateResponse(BaseModel):
+    created: int
+    results: list[UserBatchRowResult]
+
+
+class UserRoleBatchRequest(BaseModel):
+    user_ids: list[uuid.UUID] = Field(
+        min_length=1, max_length=USER_ROLE_BATCH_MAX_IDS
+    )
+
+
+class UserRoleBatchStatus(str, Enum):
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    ALREADY_ADMIN = "already_admin"
+    NOT_ADMIN = "not_admin"
+    FORBIDDEN = "forbidden"
+
+
+class UserRoleBatchResult(BaseModel):
+    user_id: uuid.UUID
+    status: UserRoleBatchStatus
+
+
+class UserRoleBatchResponse(BaseModel):
+    updated: int
+    results: list[UserRoleBatchResult]
+
+
 class UserUpdatedResponse(BaseModel):
     updated_user_id: uuid.UUID
 
@@ -90,3 +241,12 @@ class TokenTypeEnum(str, Enum):
 class Token(BaseModel):
     access_token: str
     token_type: TokenTypeEnum
+    refresh_token: str | None = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class RefreshTokensRevokedResponse(BaseModel):
+    revoked: int
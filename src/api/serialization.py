@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from src.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def get_default_response_class() -> type[JSONResponse]:
+    if settings.APP_FAST_JSON and orjson is not None:
+        return ORJSONResponse
+    return JSONResponse
+
+
+def render(
+    schema: Any,
+    content: Any,
+    status_code: int = 200,
+    response: Response | None = None,
+) -> Any:
+    if not settings.APP_FAST_JSON:
+        return content
+
+    # Validates straight from ORM attributes and encodes to JSON bytes in
+    # pydantic-core, skipping FastAPI's second validation and the
+    # intermediate jsonable dict.
+    adapter = get_type_adapter(schema)
+    if not isinstance(content, schema):
+        content = adapter.validate_python(content, from_attributes=True)
+    rendered = Response(
+        adapter.dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+    )
+    # FastAPI only merges the dependencies' Response into the responses it
+    # builds itself, so cookies and headers they set are carried over here.
+    if response is not None:
+        rendered.raw_headers.extend(response.raw_headers)
+    return rendered
@@ -1,4 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from src.api.actions.auth import get_current_principal_from_token
+from src.api.schemas import Principal
+from src.cache import principal_cache
+from src.db.database import async_engine, replica_set
+from src.db.pool import get_pool_stats
+from src.metrics import generate_metrics
+from src.throttling import login_throttle
 
 service_router = APIRouter()
 
@@ -6,3 +15,38 @@ service_router = APIRouter()
 @service_router.get("/ping")
 async def ping():
     return {"success": True}
+
+
+@service_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+@service_router.get("/debug/principal-cache")
+async def get_principal_cache_stats(
+    current_user: Principal = Depends(get_current_principal_from_token),
+):
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return principal_cache.stats()
+
+
+@service_router.get("/debug/login-throttle")
+async def get_login_throttle_stats(
+    current_user: Principal = Depends(get_current_principal_from_token),
+):
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return login_throttle.stats()
+
+
+@service_router.get("/debug/pool")
+async def get_db_pool_stats(
+    current_user: Principal = Depends(get_current_principal_from_token),
+):
+    if not (current_user.is_admin or current_user.is_superadmin):
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    return {
+        **get_pool_stats(async_engine.pool),
+        "replicas": replica_set.stats(),
+    }
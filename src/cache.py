@@ -0,0 +1,178 @@
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+from uuid import UUID
+
+from src.config import auth_settings
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+        while len(self._data) > self.maxsize:
+            oldest_key = next(iter(self._data))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable) -> Any:
+        _, value = self._data.pop(key)
+        return value
+
+
+class PrincipalCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._keys_by_user_id: dict[UUID, Hashable] = {}
+
+    def set(self, key: Hashable, value: Any) -> None:
+        previous_key = self._keys_by_user_id.get(value.user_id)
+        if previous_key is not None and previous_key != key:
+            self.pop(previous_key)
+
+        super().set(key, value)
+        if key in self._data:
+            self._keys_by_user_id[value.user_id] = key
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        if (key := self._keys_by_user_id.get(user_id)) is not None:
+            self.pop(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self._keys_by_user_id.clear()
+
+    def _remove(self, key: Hashable) -> Any:
+        value = super()._remove(key)
+        if self._keys_by_user_id.get(value.user_id) == key:
+            del self._keys_by_user_id[value.user_id]
+        return value
+
+
+class ExpiringCache:
+    # Entries carry their own absolute (epoch) expiry; a min-heap keyed by
+    # it lets expired and overflow entries be dropped from the front
+    # without scanning. Heap entries for replaced keys are skipped lazily.
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._expiry: list[tuple[float, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        now = time.time()
+        if self.maxsize <= 0 or expires_at <= now:
+            return
+
+        self._data[key] = (expires_at, value)
+        heapq.heappush(self._expiry, (expires_at, key))
+        self._evict(now)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._expiry.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self, now: float) -> None:
+        while self._expiry and (
+            self._expiry[0][0] <= now or len(self._data) > self.maxsize
+        ):
+            expires_at, key = heapq.heappop(self._expiry)
+            item = self._data.get(key)
+            if item is None or item[0] != expires_at:
+                continue
+            del self._data[key]
+            if expires_at > now:
+                self.evictions += 1
+
+        if len(self._expiry) > 2 * self.maxsize:
+            self._expiry = [
+                (expires_at, key)
+                for key, (expires_at, _) in self._data.items()
+            ]
+            heapq.heapify(self._expiry)
+
+
+principal_cache = PrincipalCache(
+    maxsize=auth_settings.PRINCIPAL_CACHE_SIZE,
+    ttl=auth_settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+token_cache = ExpiringCache(maxsize=auth_settings.TOKEN_CACHE_SIZE)
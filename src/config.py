@@ -1,3 +1,7 @@
+import os
+from ipaddress import IPv4Network, IPv6Network, ip_network
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,6 +9,27 @@ class AuthSettings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    AUTH_STATELESS_TOKENS: bool = False
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0
+    PASSWORD_HASH_ROUNDS: int = 0
+    PASSWORD_HASH_TARGET_MS: float = 250.0
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 16
+
+    LOGIN_ATTEMPTS_PER_EMAIL: int = 5
+    LOGIN_ATTEMPTS_PER_IP: int = 50
+    LOGIN_ATTEMPTS_WINDOW_SECONDS: float = 60.0
+    LOGIN_THROTTLE_MAX_KEYS: int = 100_000
+    LOGIN_THROTTLE_SWEEP_SECONDS: float = 60.0
+
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    TOKEN_CACHE_SIZE: int = 10_000
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -16,16 +41,47 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_NAME: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_CONNECTION_BUDGET: int = 0
+    DB_ECHO: bool = False
+    DB_SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    DB_QUERY_BUDGET: int = 10
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER_COMPATIBLE: bool = False
+
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    DB_READ_YOUR_WRITES_SECONDS: int = 5
+
     TEST_DB_USER: str
     TEST_DB_PASSWORD: str
     TEST_DB_HOST: str
     TEST_DB_PORT: str
     TEST_DB_NAME: str
 
+    APP_HOST: str = "0.0.0.0"
     APP_PORT: int
+    APP_MODE: Literal["dev", "prod"] = "dev"
+    APP_WORKERS: int = 0
+    APP_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    APP_FAST_JSON: bool = True
+    APP_TRUSTED_PROXIES: str = ""
+
+    USER_SEARCH_FUZZY: bool = True
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def APP_WORKERS_COUNT(self) -> int:
+        if self.APP_MODE != "prod" or not hasattr(os, "fork"):
+            return 1
+        return self.APP_WORKERS or os.cpu_count() or 1
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -33,6 +89,23 @@ class Settings(BaseSettings):
             f"{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         )
 
+    @property
+    def DATABASE_REPLICA_URLS(self) -> list[str]:
+        return [
+            f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@"
+            f"{host.strip()}/{self.DB_NAME}"
+            for host in self.DB_REPLICA_HOSTS.split(",")
+            if host.strip()
+        ]
+
+    @property
+    def APP_TRUSTED_PROXY_NETWORKS(self) -> list[IPv4Network | IPv6Network]:
+        return [
+            ip_network(proxy.strip(), strict=False)
+            for proxy in self.APP_TRUSTED_PROXIES.split(",")
+            if proxy.strip()
+        ]
+
     @property
     def TEST_DATABASE_URL(self):
         return (
@@ -1,13 +1,57 @@
-from typing import List
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Sequence
 from uuid import UUID
+from weakref import WeakKeyDictionary
 
-from sqlalchemy import select, update
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Row,
+    String,
+    cast,
+    delete,
+    false,
+    func,
+    lambda_stmt,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import PortalRole, UserEntity
+from src.cache import principal_cache
+from src.db.models import (
+    PRIVILEGED_ROLES_MASK,
+    ROLE_MASKS,
+    PortalRole,
+    RefreshTokenEntity,
+    UserCounterEntity,
+    UserEntity,
+    get_roles_mask,
+)
+
+USER_SEARCH_SIMILAR_CANDIDATES = 500
+
+
+def manageable_by(actor_roles_mask: int) -> List[ColumnElement]:
+    if actor_roles_mask & ROLE_MASKS[PortalRole.ADMIN]:
+        return [~UserEntity.has_any_role(PRIVILEGED_ROLES_MASK)]
+    if actor_roles_mask & ROLE_MASKS[PortalRole.SUPERADMIN]:
+        return []
+    return [false()]
 
 
 class UserDAL:
+    _trigram_support: WeakKeyDictionary[Engine, bool] = WeakKeyDictionary()
+
     def __init__(self, db_session: AsyncSession):
         self.__db_session = db_session
 
@@ -31,6 +75,16 @@ class UserDAL:
         await self.__db_session.flush()
         return new_user
 
+    async def create_users(self, users: List[dict]) -> dict[str, UUID]:
+        query = (
+            insert(UserEntity)
+            .values(users)
+            .on_conflict_do_nothing()
+            .returning(UserEntity.email, UserEntity.user_id)
+        )
+        result = await self.__db_session.execute(query)
+        return {email: user_id for email, user_id in result.all()}
+
     async def get_all_users(
         self,
         filters: dict | None = None,
@@ -49,11 +103,261 @@ class UserDAL:
         result = await self.__db_session.execute(query)
         return result.scalars().all()
 
+    async def get_users_page(
+        self,
+        limit: int,
+        after_user_id: UUID | None = None,
+        is_active: bool | None = None,
+        role: PortalRole | None = None,
+    ) -> List[UserEntity]:
+        query = select(UserEntity).order_by(UserEntity.user_id).limit(limit)
+
+        if after_user_id is not None:
+            query = query.where(UserEntity.user_id > after_user_id)
+        if is_active is not None:
+            query = query.where(UserEntity.is_active == is_active)
+        if role is not None:
+            query = query.where(UserEntity.has_role(role))
+
+        result = await self.__db_session.execute(query)
+        return result.scalars().all()
+
+    async def count_users(
+        self, is_active: bool | None = None, role: PortalRole | None = None
+    ) -> int:
+        query = select(func.count()).select_from(UserEntity)
+        query = query.where(*self._get_filter_conditions(is_active, role))
+        result = await self.__db_session.execute(query)
+        return result.scalar()
+
+    async def estimate_users_count(
+        self, is_active: bool | None = None, role: PortalRole | None = None
+    ) -> int:
+        conditions = self._get_filter_conditions(is_active, role)
+        if not conditions:
+            # What the planner itself assumes: tuple density from the last
+            # ANALYZE scaled to the current table size.
+            result = await self.__db_session.execute(
+                text(
+                    "SELECT CASE WHEN reltuples < 0 OR relpages = 0 "
+                    "THEN NULL ELSE reltuples / relpages * "
+                    "(pg_relation_size(oid) / "
+                    "current_setting('block_size')::int) END "
+                    "FROM pg_class WHERE oid = 'users'::regclass"
+                )
+            )
+            estimate = result.scalar()
+            if estimate is not None:
+                return round(estimate)
+
+        query = select(UserEntity.user_id).where(*conditions)
+        compiled = query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+        result = await self.__db_session.execute(
+            text(f"EXPLAIN (FORMAT JSON) {compiled}")
+        )
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def get_maintained_users_count(
+        self, is_active: bool | None = None, role: PortalRole | None = None
+    ) -> int:
+        query = select(func.coalesce(func.sum(UserCounterEntity.count), 0))
+        if is_active is not None:
+            query = query.where(UserCounterEntity.is_active == is_active)
+        if role is not None:
+            query = query.where(
+                UserCounterEntity.roles_mask.op("&")(ROLE_MASKS[role]) != 0
+            )
+        result = await self.__db_session.execute(query)
+        return int(result.scalar())
+
+    @staticmethod
+    def _get_filter_conditions(
+        is_active: bool | None, role: PortalRole | None
+    ) -> List[ColumnElement]:
+        conditions = []
+        if is_active is not None:
+            conditions.append(UserEntity.is_active == is_active)
+        if role is not None:
+            conditions.append(UserEntity.has_role(role))
+        return conditions
+
+    async def stream_users(
+        self,
+        columns: Sequence[str],
+        is_active: bool | None = None,
+        role: PortalRole | None = None,
+        batch_size: int = 1_000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(*(getattr(UserEntity, column) for column in columns))
+            .order_by(UserEntity.user_id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        if is_active is not None:
+            query = query.where(UserEntity.is_active == is_active)
+        if role is not None:
+            query = query.where(UserEntity.has_role(role))
+
+        result = await self.__db_session.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def search_users(
+        self,
+        term: str,
+        limit: int,
+        after: tuple[float, UUID] | None = None,
+        is_active: bool | None = None,
+        fuzzy: bool = False,
+    ) -> List[Row]:
+        # Ranks: 0 exact, 1 prefix, 2 substring, 3 + trigram distance for
+        # similar. Each tier is its own LIMITed query ordered the way an
+        # index can return it, so a term matching a large share of users
+        # never scores or sorts more than a page.
+        term = term.lower()
+        pattern = (
+            term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        # The terms are rendered inline: a generic plan for a prepared
+        # LIKE $1 cannot use any index and walks the whole table.
+        exact, prefix, substring = (
+            literal(value, String, literal_execute=True)
+            for value in (term, f"{pattern}%", f"%{pattern}%")
+        )
+        fields = [
+            func.lower(UserEntity.name),
+            func.lower(UserEntity.surname),
+            func.lower(UserEntity.email),
+        ]
+        tiers = [
+            or_(*(field == exact for field in fields)),
+            or_(*(field.like(prefix) for field in fields)),
+            or_(*(field.like(substring) for field in fields)),
+        ]
+        after_rank, after_user_id = after or (0.0, None)
+
+        rows = []
+        for rank, match in enumerate(tiers):
+            if len(rows) >= limit:
+                return rows[:limit]
+            if rank < int(after_rank):
+                continue
+            # Always ask for a full page: with a tiny LIMIT the planner
+            # bets on walking the primary key until a match turns up.
+            query = (
+                select(UserEntity, literal(float(rank), Float).label("rank"))
+                .where(match)
+                .order_by(UserEntity.user_id)
+                .limit(limit)
+            )
+            if rank:
+                # Tiers nest, so excluding the previous one is enough.
+                query = query.where(~tiers[rank - 1])
+            if is_active is not None:
+                query = query.where(UserEntity.is_active == is_active)
+            if after is not None and rank == after_rank:
+                query = query.where(UserEntity.user_id > after_user_id)
+            result = await self.__db_session.execute(query)
+            rows.extend(result.all())
+
+        if fuzzy and len(rows) < limit:
+            # Emails are long and share their domains, so whole-string
+            # similarity to a short term is noise there and every row
+            # would pass the index prefilter; only names are fuzzy.
+            rows.extend(
+                await self._search_similar(
+                    exact,
+                    fields[:2],
+                    exclude=tiers[-1],
+                    limit=limit - len(rows),
+                    after=after if after_rank >= len(tiers) else None,
+                    is_active=is_active,
+                )
+            )
+        return rows[:limit]
+
+    async def _search_similar(
+        self,
+        term: ColumnElement,
+        fields: List[ColumnElement],
+        exclude: ColumnElement,
+        limit: int,
+        after: tuple[float, UUID] | None,
+        is_active: bool | None,
+    ) -> List[Row]:
+        # Trigram distance cannot be served in order by the GIN indexes,
+        # so only the first USER_SEARCH_SIMILAR_CANDIDATES similar users
+        # the index yields are scored; a short common term may otherwise
+        # be "similar" to a large share of the table.
+        rank = 3 + cast(
+            func.least(*(field.op("<->")(term) for field in fields)), Float
+        )
+        candidates = (
+            select(UserEntity.user_id)
+            .where(or_(*(field.op("%")(term) for field in fields)), ~exclude)
+            .limit(USER_SEARCH_SIMILAR_CANDIDATES)
+        )
+        if is_active is not None:
+            candidates = candidates.where(UserEntity.is_active == is_active)
+        if after is not None:
+            after_rank, after_user_id = after
+            candidates = candidates.where(
+                tuple_(rank, UserEntity.user_id)
+                > tuple_(literal(after_rank, Float), after_user_id)
+            )
+
+        query = (
+            select(UserEntity, rank.label("rank"))
+            .where(UserEntity.user_id.in_(candidates))
+            .order_by(rank, UserEntity.user_id)
+            .limit(limit)
+        )
+        result = await self.__db_session.execute(query)
+        return result.all()
+
+    async def has_trigram_support(self) -> bool:
+        # Extensions do not come and go at runtime, but the primary and
+        # each replica may differ; ask once per engine.
+        engine = self.__db_session.get_bind().engine
+        if engine not in UserDAL._trigram_support:
+            result = await self.__db_session.execute(
+                text(
+                    "SELECT EXISTS "
+                    "(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                )
+            )
+            UserDAL._trigram_support[engine] = result.scalar()
+        return UserDAL._trigram_support[engine]
+
     async def get_user(self, filters: dict) -> UserEntity | None:
         query = select(UserEntity).filter_by(**filters)
         result = await self.__db_session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_user_by_email(self, email: str) -> UserEntity | None:
+        normalized_email = email.lower()
+        query = lambda_stmt(
+            lambda: select(UserEntity).where(
+                func.lower(UserEntity.email) == normalized_email
+            )
+        )
+        result = await self.__db_session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_user_by_id(self, user_id: UUID) -> UserEntity | None:
+        query = lambda_stmt(
+            lambda: select(UserEntity).where(UserEntity.user_id == user_id)
+        )
+        result = await self.__db_session.execute(query)
+        return result.scalar_one_or_none()
+
     async def update_user(
         self, user_id: UUID, values_dict: dict
     ) -> UUID | None:
@@ -64,13 +368,40 @@ class UserDAL:
             .returning(UserEntity.user_id)
         )
         res = await self.__db_session.execute(query)
+        principal_cache.invalidate_user(user_id)
         return res.scalar_one_or_none()
 
+    async def update_password_hash(
+        self, user_id: UUID, old_hash: str, new_hash: str
+    ) -> bool:
+        # Only replaces the hash that was verified, so a password change
+        # racing with the login is never overwritten.
+        query = (
+            update(UserEntity)
+            .where(
+                UserEntity.user_id == user_id,
+                UserEntity.hashed_password == old_hash,
+            )
+            .values(hashed_password=new_hash)
+            .returning(UserEntity.user_id)
+        )
+        result = await self.__db_session.execute(query)
+        principal_cache.invalidate_user(user_id)
+        return result.scalar_one_or_none() is not None
+
     async def update_many(self, filters: dict, values: dict) -> int:
-        query = update(UserEntity).filter_by(**filters).values(**values)
+        query = (
+            update(UserEntity)
+            .filter_by(**filters)
+            .values(**values)
+            .returning(UserEntity.user_id)
+        )
         result = await self.__db_session.execute(query)
         await self.__db_session.flush()
-        return result.rowcount
+        updated_user_ids = result.scalars().all()
+        for user_id in updated_user_ids:
+            principal_cache.invalidate_user(user_id)
+        return len(updated_user_ids)
 
     async def delete_user(self, user_id: UUID) -> UUID | None:
         query = (
@@ -80,4 +411,178 @@ class UserDAL:
             .returning(UserEntity.user_id)
         )
         result = await self.__db_session.execute(query)
+        principal_cache.invalidate_user(user_id)
         return result.scalar()
+
+    async def update_user_if(
+        self,
+        user_id: UUID,
+        values: dict,
+        conditions: Sequence[ColumnElement] = (),
+    ) -> Row | None:
+        rows = await self.update_users_if([user_id], values, conditions)
+        return rows[0] if rows else None
+
+    async def update_users_if(
+        self,
+        user_ids: Sequence[UUID],
+        values: dict,
+        conditions: Sequence[ColumnElement] = (),
+    ) -> List[Row]:
+        # One round trip: each target's roles and is_active as they were
+        # before the update, plus updated_user_id which stays NULL when
+        # a condition failed. Ids without a row do not exist.
+        users = UserEntity.__table__
+        target = (
+            select(
+                users.c.user_id,
+                users.c.roles,
+                users.c.roles_mask,
+                users.c.is_active,
+            )
+            .where(users.c.user_id.in_(user_ids))
+            .cte("target")
+        )
+        updated = (
+            update(users)
+            .where(
+                users.c.user_id.in_(user_ids), users.c.is_active, *conditions
+            )
+            .values(**values)
+            .returning(users.c.user_id)
+            .cte("updated")
+        )
+        query = select(
+            target.c.user_id,
+            target.c.roles,
+            target.c.roles_mask,
+            target.c.is_active,
+            updated.c.user_id.label("updated_user_id"),
+        ).select_from(
+            target.outerjoin(updated, target.c.user_id == updated.c.user_id)
+        )
+
+        result = await self.__db_session.execute(query)
+        for user_id in user_ids:
+            principal_cache.invalidate_user(user_id)
+        return result.all()
+
+    async def delete_user_if(
+        self, user_id: UUID, conditions: Sequence[ColumnElement] = ()
+    ) -> Row | None:
+        return await self.update_user_if(
+            user_id, {"is_active": False}, conditions
+        )
+
+    async def add_user_role(
+        self,
+        user_id: UUID,
+        role: PortalRole,
+        excluded_roles: Sequence[PortalRole],
+    ) -> Row | None:
+        rows = await self.add_users_role([user_id], role, excluded_roles)
+        return rows[0] if rows else None
+
+    async def add_users_role(
+        self,
+        user_ids: Sequence[UUID],
+        role: PortalRole,
+        excluded_roles: Sequence[PortalRole],
+        conditions: Sequence[ColumnElement] = (),
+    ) -> List[Row]:
+        return await self.update_users_if(
+            user_ids,
+            {"roles": func.array_append(UserEntity.roles, role)},
+            [
+                ~UserEntity.has_any_role(get_roles_mask(excluded_roles)),
+                *conditions,
+            ],
+        )
+
+    async def remove_user_role(
+        self, user_id: UUID, role: PortalRole
+    ) -> Row | None:
+        rows = await self.remove_users_role([user_id], role)
+        return rows[0] if rows else None
+
+    async def remove_users_role(
+        self,
+        user_ids: Sequence[UUID],
+        role: PortalRole,
+        conditions: Sequence[ColumnElement] = (),
+    ) -> List[Row]:
+        return await self.update_users_if(
+            user_ids,
+            {"roles": func.array_remove(UserEntity.roles, role)},
+            [UserEntity.has_role(role), *conditions],
+        )
+
+
+class RefreshTokenDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.__db_session = db_session
+
+    async def create_token(
+        self, token_hash: bytes, user_id: UUID, expires_at: datetime
+    ) -> None:
+        await self.__db_session.execute(
+            insert(RefreshTokenEntity).values(
+                token_hash=token_hash, user_id=user_id, expires_at=expires_at
+            )
+        )
+
+    async def use_token(self, token_hash: bytes) -> Row | None:
+        # Marks the token used and reports, in one round trip, whether it
+        # was still valid: used_user_id stays NULL for a token that was
+        # already used, revoked or expired. No row means unknown token.
+        tokens = RefreshTokenEntity.__table__
+        target = (
+            select(tokens.c.token_hash, tokens.c.user_id)
+            .where(tokens.c.token_hash == token_hash)
+            .cte("target")
+        )
+        used = (
+            update(tokens)
+            .where(
+                tokens.c.token_hash == token_hash,
+                tokens.c.revoked_at.is_(None),
+                tokens.c.expires_at > func.now(),
+            )
+            .values(revoked_at=func.now())
+            .returning(tokens.c.user_id)
+            .cte("used")
+        )
+        query = select(
+            target.c.user_id,
+            used.c.user_id.label("used_user_id"),
+        ).select_from(target.outerjoin(used, true()))
+
+        result = await self.__db_session.execute(query)
+        return result.one_or_none()
+
+    async def revoke_user_tokens(self, user_id: UUID) -> int:
+        result = await self.__db_session.execute(
+            update(RefreshTokenEntity)
+            .where(
+                RefreshTokenEntity.user_id == user_id,
+                RefreshTokenEntity.revoked_at.is_(None),
+            )
+            .values(revoked_at=func.now())
+        )
+        return result.rowcount
+
+    async def delete_expired_tokens(self, limit: int) -> int:
+        # SKIP LOCKED: concurrent logins prune disjoint rows instead of
+        # queueing behind each other.
+        expired = (
+            select(RefreshTokenEntity.token_hash)
+            .where(RefreshTokenEntity.expires_at <= func.now())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.__db_session.execute(
+            delete(RefreshTokenEntity).where(
+                RefreshTokenEntity.token_hash.in_(expired.scalar_subquery())
+            )
+        )
+        return result.rowcount
@@ -1,26 +1,160 @@
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncContextManager, AsyncGenerator, Callable
+from uuid import uuid4
 
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi import Request, Response
+from sqlalchemy.exc import (
+    DBAPIError,
+    InterfaceError,
+    OperationalError,
+    SQLAlchemyError,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from src.config import settings
+from src.db.instrumentation import instrument_engine
+from src.db.pool import InstrumentedAsyncQueuePool, get_pool_limits
+from src.db.replicas import Replica, ReplicaSet
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+SessionScope = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def get_connect_args() -> dict:
+    if settings.DB_PGBOUNCER_COMPATIBLE:
+        # PgBouncer in transaction mode cannot keep prepared statements
+        # between transactions, so disable both caches and give every
+        # statement a unique name.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "prepared_statement_cache_size": (
+            settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        ),
+    }
+
+
+def get_engine_options() -> dict:
+    pool_size, max_overflow = get_pool_limits(
+        settings.DB_POOL_SIZE,
+        settings.DB_MAX_OVERFLOW,
+        settings.DB_CONNECTION_BUDGET,
+        settings.APP_WORKERS_COUNT,
+    )
+    return {
+        "echo": settings.DB_ECHO,
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "connect_args": get_connect_args(),
+        "execution_options": {"isolation_level": "AUTOCOMMIT"},
+    }
+
 
 async_engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True,
-    execution_options={"isolation_level": "AUTOCOMMIT"},
+    settings.DATABASE_URL, future=True, **get_engine_options()
 )
+instrument_engine(async_engine, "primary")
 async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+replica_set = ReplicaSet.from_urls(
+    settings.DATABASE_REPLICA_URLS,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+    **get_engine_options(),
+)
+for index, replica in enumerate(replica_set.replicas):
+    instrument_engine(replica.engine, f"replica{index}")
+
+
+@asynccontextmanager
+async def _session_scope(
+    session_maker: async_sessionmaker,
+) -> AsyncGenerator[AsyncSession, None]:
+    # AsyncSession takes a connection from the pool on its first query
+    # and returns it when that transaction ends, so requests rejected
+    # before touching the database never wait on the pool.
+    session = session_maker()
+    try:
+        yield session
+        if session.in_transaction():
+            await session.commit()
+    except SQLAlchemyError:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
 
 
 async def get_db_session() -> AsyncGenerator:
-    async with async_session_maker() as session:
-        try:
+    async with _session_scope(async_session_maker) as session:
+        yield session
+
+
+async def get_db_read_session(request: Request) -> AsyncGenerator:
+    async with _read_session_scope(_choose_replica(request)) as session:
+        yield session
+
+
+def get_db_read_session_scope(request: Request) -> SessionScope:
+    # For streaming responses: dependency teardown runs before the body
+    # is sent, so the stream must own its session instead of borrowing
+    # the request's one.
+    return partial(_read_session_scope, _choose_replica(request))
+
+
+def _choose_replica(request: Request) -> Replica | None:
+    if _reads_pinned_to_primary(request):
+        return None
+    return replica_set.choose()
+
+
+@asynccontextmanager
+async def _read_session_scope(
+    replica: Replica | None,
+) -> AsyncGenerator[AsyncSession, None]:
+    if replica is None:
+        async with _session_scope(async_session_maker) as session:
             yield session
-            await session.commit()
-        except SQLAlchemyError:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+        return
+
+    try:
+        async with _session_scope(replica.session_maker) as session:
+            yield session
+    except (OperationalError, InterfaceError, OSError):
+        replica_set.mark_unhealthy(replica)
+        raise
+    except DBAPIError as err:
+        if err.connection_invalidated:
+            replica_set.mark_unhealthy(replica)
+        raise
+
+
+def mark_primary_reads(response: Response) -> None:
+    if replica_set.replicas:
+        window = settings.DB_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(int(time.time()) + window),
+            max_age=window,
+            httponly=True,
+        )
+
+
+def _reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
@@ -0,0 +1,111 @@
+import time
+from contextvars import ContextVar
+from logging import getLogger
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config import settings
+from src.db.pool import InstrumentedAsyncQueuePool
+from src.metrics import DB_QUERIES_PER_REQUEST, PoolMetrics, get_query_timers
+
+logger = getLogger(__name__)
+
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "path")
+
+    def __init__(self, path: str):
+        self.count = 0
+        self.seconds = 0.0
+        self.path = path
+
+
+_request_queries: ContextVar[RequestQueries | None] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def get_request_queries() -> RequestQueries | None:
+    return _request_queries.get()
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    timers = get_query_timers(name)
+    other_timer = timers["OTHER"]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - context._query_started_at
+        operation = statement.lstrip()[:6].upper()
+        timers.get(operation, other_timer).observe(elapsed)
+
+        request_queries = _request_queries.get()
+        if request_queries is not None:
+            request_queries.count += 1
+            request_queries.seconds += elapsed
+
+        threshold_ms = settings.DB_SLOW_QUERY_THRESHOLD_MS
+        if threshold_ms and elapsed * 1000 >= threshold_ms:
+            # Only the statement text is logged: bound values may hold
+            # password hashes or other user data.
+            logger.warning(
+                "Slow query on %s took %.1f ms (%s, %d parameters "
+                "redacted): %s",
+                name,
+                elapsed * 1000,
+                request_queries.path if request_queries else "no request",
+                _count_parameters(parameters, executemany),
+                statement,
+            )
+
+    if isinstance(engine.pool, InstrumentedAsyncQueuePool):
+        engine.pool.metrics = PoolMetrics(name)
+        engine.pool.metrics.observe(engine.pool)
+
+
+def _count_parameters(parameters, executemany: bool) -> int:
+    if not parameters:
+        return 0
+    if executemany:
+        return sum(len(row) for row in parameters)
+    return len(parameters)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_queries = RequestQueries(scope["path"])
+        token = _request_queries.set(request_queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            DB_QUERIES_PER_REQUEST.observe(request_queries.count)
+
+            budget = settings.DB_QUERY_BUDGET
+            if budget and request_queries.count > budget:
+                route = scope.get("route")
+                logger.warning(
+                    "%s %s ran %d queries in %.1f ms, over the budget of %d",
+                    scope["method"],
+                    getattr(route, "path_format", scope["path"]),
+                    request_queries.count,
+                    request_queries.seconds * 1000,
+                    budget,
+                )
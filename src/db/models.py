@@ -1,11 +1,26 @@
 import uuid
+from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import Iterable, List
 
-from sqlalchemy import ARRAY, String
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    event,
+    func,
+    literal_column,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, validates
 
 
 class PortalRole(str, Enum):
@@ -14,6 +29,26 @@ class PortalRole(str, Enum):
     SUPERADMIN = "SUPERADMIN"
 
 
+ROLE_MASKS = {
+    PortalRole.USER: 1,
+    PortalRole.ADMIN: 2,
+    PortalRole.SUPERADMIN: 4,
+}
+# Concurrent writers spread their counter updates over this many rows per
+# (roles_mask, is_active) group instead of queueing on a single one.
+USER_COUNTER_SHARDS = 16
+PRIVILEGED_ROLES_MASK = (
+    ROLE_MASKS[PortalRole.ADMIN] | ROLE_MASKS[PortalRole.SUPERADMIN]
+)
+
+
+def get_roles_mask(roles: Iterable[str]) -> int:
+    mask = 0
+    for role in roles:
+        mask |= ROLE_MASKS.get(role, 0)
+    return mask
+
+
 class BaseEntity(DeclarativeBase, AsyncAttrs):
     pass
 
@@ -32,19 +67,172 @@ class UserEntity(BaseEntity):
     roles: Mapped[List[PortalRole]] = mapped_column(
         ARRAY(String), default=[PortalRole.USER]
     )
+    # Bitmask mirror of roles (see ROLE_MASKS), kept in sync by the
+    # users_sync_roles_mask trigger while roles is still written to.
+    roles_mask: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+
+    @validates("roles")
+    def _sync_roles_mask(self, key: str, roles: List[PortalRole]):
+        self.roles_mask = get_roles_mask(roles or [])
+        return roles
 
     @property
     def is_superadmin(self) -> bool:
-        return PortalRole.SUPERADMIN in self.roles
+        return bool(self.roles_mask & ROLE_MASKS[PortalRole.SUPERADMIN])
 
     @property
     def is_admin(self) -> bool:
-        return PortalRole.ADMIN in self.roles
+        return bool(self.roles_mask & ROLE_MASKS[PortalRole.ADMIN])
+
+    @classmethod
+    def has_role(cls, role: PortalRole):
+        return cls.has_any_role(ROLE_MASKS[role])
+
+    @classmethod
+    def has_any_role(cls, mask: int):
+        # Inlined rather than bound so that generic plans of prepared
+        # statements still match the partial index predicate.
+        return cls.roles_mask.op("&")(literal_column(str(int(mask)))) != (
+            literal_column("0")
+        )
+
+
+Index("ix_users_email_lower", func.lower(UserEntity.email), unique=True)
+Index(
+    "ix_users_active_user_id",
+    UserEntity.user_id,
+    postgresql_where=UserEntity.is_active,
+)
+Index("ix_users_roles_gin", UserEntity.roles, postgresql_using="gin")
+# User search: exact and prefix matches. text_pattern_ops serves LIKE
+# 'term%' under any collation.
+for _column in (UserEntity.name, UserEntity.surname, UserEntity.email):
+    Index(
+        f"ix_users_{_column.key}_lower_pattern",
+        func.lower(_column).label(_column.key),
+        postgresql_ops={_column.key: "text_pattern_ops"},
+    )
+# Admins are a tiny fraction of users, so role filters on them only need
+# to walk a small partial index in user_id order. The planner cannot prove
+# one bit test from another, hence one index per role.
+Index(
+    "ix_users_admin_user_id",
+    UserEntity.user_id,
+    postgresql_where=UserEntity.has_role(PortalRole.ADMIN),
+)
+Index(
+    "ix_users_superadmin_user_id",
+    UserEntity.user_id,
+    postgresql_where=UserEntity.has_role(PortalRole.SUPERADMIN),
+)
+
+_ROLES_MASK_EXPRESSION = " | ".join(
+    f"(CASE WHEN '{role.value}' = ANY(NEW.roles) THEN {mask} ELSE 0 END)"
+    for role, mask in ROLE_MASKS.items()
+)
+event.listen(
+    UserEntity.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION users_sync_roles_mask() "
+        "RETURNS trigger AS $$ BEGIN "
+        f"NEW.roles_mask := {_ROLES_MASK_EXPRESSION}; "
+        "RETURN NEW; END $$ LANGUAGE plpgsql"
+    ),
+)
+event.listen(
+    UserEntity.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER users_sync_roles_mask "
+        "BEFORE INSERT OR UPDATE OF roles ON users "
+        "FOR EACH ROW EXECUTE FUNCTION users_sync_roles_mask()"
+    ),
+)
 
-    def enrich_admin_roles_by_admin_role(self):
-        if not self.is_admin:
-            return {*self.roles, PortalRole.ADMIN}
 
-    def remove_admin_privileges_from_model(self):
-        if self.is_admin:
-            return {role for role in self.roles if role != PortalRole.ADMIN}
+class RefreshTokenEntity(BaseEntity):
+    __tablename__ = "refresh_tokens"
+
+    # sha256 of the token's jti; the token itself is never stored.
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary, primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        index=True,
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    revoked_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+
+
+class UserCounterEntity(BaseEntity):
+    __tablename__ = "user_counters"
+
+    # Written only by the users_count_changes triggers; a group's count
+    # is the sum over its shards, and single shards may go negative.
+    roles_mask: Mapped[int] = mapped_column(primary_key=True)
+    is_active: Mapped[bool] = mapped_column(primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger)
+
+
+_COUNT_DELTAS_UPSERT = (
+    "INSERT INTO user_counters AS counter "
+    "(roles_mask, is_active, shard, count) "
+    "SELECT roles_mask, is_active, counter_shard, sum(delta) "
+    "FROM ({changes}) AS changes "
+    "GROUP BY roles_mask, is_active HAVING sum(delta) <> 0 "
+    # A fixed order keeps concurrent statements from deadlocking.
+    "ORDER BY roles_mask, is_active "
+    "ON CONFLICT (roles_mask, is_active, shard) "
+    "DO UPDATE SET count = counter.count + excluded.count;"
+)
+_NEW_ROWS = "SELECT roles_mask, is_active, 1 AS delta FROM new_rows"
+_OLD_ROWS = "SELECT roles_mask, is_active, -1 AS delta FROM old_rows"
+event.listen(
+    UserEntity.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION users_count_changes() "
+        "RETURNS trigger AS $$ DECLARE "
+        f"counter_shard smallint := floor(random() * {USER_COUNTER_SHARDS}); "
+        "BEGIN "
+        "IF TG_OP = 'TRUNCATE' THEN DELETE FROM user_counters; "
+        "ELSIF TG_OP = 'INSERT' THEN "
+        f"{_COUNT_DELTAS_UPSERT.format(changes=_NEW_ROWS)} "
+        "ELSIF TG_OP = 'DELETE' THEN "
+        f"{_COUNT_DELTAS_UPSERT.format(changes=_OLD_ROWS)} "
+        "ELSE "
+        + _COUNT_DELTAS_UPSERT.format(
+            changes=f"{_NEW_ROWS} UNION ALL {_OLD_ROWS}"
+        )
+        + " END IF; RETURN NULL; END $$ LANGUAGE plpgsql"
+    ),
+)
+# Transition tables need one trigger per event.
+for _event, _referencing in (
+    ("INSERT", "NEW TABLE AS new_rows"),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("DELETE", "OLD TABLE AS old_rows"),
+):
+    event.listen(
+        UserEntity.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER users_count_{_event.lower()}s "
+            f"AFTER {_event} ON users REFERENCING {_referencing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION users_count_changes()"
+        ),
+    )
+event.listen(
+    UserEntity.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER users_count_truncates AFTER TRUNCATE ON users "
+        "FOR EACH STATEMENT EXECUTE FUNCTION users_count_changes()"
+    ),
+)
@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from src.metrics import PoolMetrics
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.metrics: PoolMetrics | None = None
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            if self.metrics is not None:
+                self.metrics.checkout_timeouts.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started_at
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            if self.metrics is not None:
+                self.metrics.checkout_wait.inc(waited)
+                self.metrics.observe(self)
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        if self.metrics is not None:
+            self.metrics.observe(self)
+
+
+def get_pool_limits(
+    pool_size: int, max_overflow: int, connection_budget: int, workers: int
+) -> tuple[int, int]:
+    if not connection_budget:
+        return pool_size, max_overflow
+
+    per_worker = max(connection_budget // workers, 1)
+    pool_size = min(pool_size, per_worker)
+    return pool_size, per_worker - pool_size
+
+
+def get_pool_stats(pool: Pool) -> dict:
+    stats = {"status": pool.status()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        stats.update(
+            {
+                "checkouts": pool.checkouts,
+                "checkout_timeouts": pool.checkout_timeouts,
+                "checkout_wait_seconds": pool.checkout_wait_seconds,
+            }
+        )
+    return stats
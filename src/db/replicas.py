@@ -0,0 +1,67 @@
+import time
+from itertools import count
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.unhealthy_until <= time.monotonic()
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica], retry_seconds: float):
+        self.replicas = replicas
+        self.retry_seconds = retry_seconds
+        self._counter = count()
+
+    @classmethod
+    def from_urls(
+        cls, urls: list[str], retry_seconds: float, **engine_options
+    ) -> "ReplicaSet":
+        return cls(
+            [
+                Replica(create_async_engine(url, **engine_options))
+                for url in urls
+            ],
+            retry_seconds,
+        )
+
+    def choose(self) -> Replica | None:
+        if not self.replicas:
+            return None
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.is_healthy:
+                return replica
+        return None
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        replica.failures += 1
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.is_healthy,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
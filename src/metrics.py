@@ -0,0 +1,192 @@
+import os
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED_ROUTE = "<unmatched>"
+# Set in the environment before start-up, prometheus_client keeps every
+# process's samples in files there so any worker can report all of them.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ["method", "route"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements.",
+    ["database", "operation"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+    ),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling one HTTP request.",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing latency, including the wait for a hasher worker.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hashing requests rejected because the hasher was busy.",
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Password hashing requests queued or running.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in",
+    "Idle connections held by the pool.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections opened above the pool size.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a connection.",
+    ["database"],
+)
+DB_POOL_CHECKOUT_WAIT = Counter(
+    "db_pool_checkout_wait_seconds_total",
+    "Total time spent waiting for pool checkouts.",
+    ["database"],
+)
+ACCESS_TOKEN_SECONDS = Histogram(
+    "access_token_create_duration_seconds",
+    "Time spent signing access tokens.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005),
+)
+
+PASSWORD_VERIFY_TIMER = PASSWORD_HASH_SECONDS.labels("verify")
+PASSWORD_HASH_TIMER = PASSWORD_HASH_SECONDS.labels("hash")
+
+_QUERY_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Label children are bound once per (method, route, status) so the
+        # request path only does a tuple lookup.
+        self._children: dict[tuple[str, str, int], tuple] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            counter, histogram = self._get_children(
+                scope["method"],
+                getattr(route, "path_format", UNMATCHED_ROUTE),
+                status_code,
+            )
+            counter.inc()
+            histogram.observe(time.perf_counter() - started_at)
+
+    def _get_children(self, method: str, route: str, status_code: int):
+        key = (method, route, status_code)
+        children = self._children.get(key)
+        if children is None:
+            children = (
+                HTTP_REQUESTS.labels(method, route, str(status_code)),
+                HTTP_REQUEST_SECONDS.labels(method, route),
+            )
+            self._children[key] = children
+        return children
+
+
+class PoolMetrics:
+    # Pushed by the pool on checkout and return rather than read at scrape
+    # time, so the samples of every worker end up in the multiprocess files.
+    __slots__ = (
+        "checked_out",
+        "checked_in",
+        "overflow",
+        "checkout_timeouts",
+        "checkout_wait",
+    )
+
+    def __init__(self, database: str):
+        self.checked_out = DB_POOL_CHECKED_OUT.labels(database)
+        self.checked_in = DB_POOL_CHECKED_IN.labels(database)
+        self.overflow = DB_POOL_OVERFLOW.labels(database)
+        self.checkout_timeouts = DB_POOL_CHECKOUT_TIMEOUTS.labels(database)
+        self.checkout_wait = DB_POOL_CHECKOUT_WAIT.labels(database)
+
+    def observe(self, pool: QueuePool) -> None:
+        self.checked_out.set(pool.checkedout())
+        self.checked_in.set(pool.checkedin())
+        self.overflow.set(max(pool.overflow(), 0))
+
+
+def generate_metrics() -> bytes:
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return generate_latest()
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def get_query_timers(database: str) -> dict[str, Histogram]:
+    timers = {
+        operation: DB_QUERY_SECONDS.labels(database, operation.lower())
+        for operation in _QUERY_OPERATIONS
+    }
+    timers["OTHER"] = DB_QUERY_SECONDS.labels(database, "other")
+    return timers
@@ -55,8 +55,20 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # pg_trgm indexes exist only where the extension is installed, so
+    # they live in migrations and not in the model metadata.
+    return not (
+        type_ == "index" and reflected and name.startswith("ix_users_trgm_")
+    )
+
+
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
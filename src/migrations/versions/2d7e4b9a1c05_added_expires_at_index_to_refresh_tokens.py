@@ -0,0 +1,70 @@
+"""Added expires_at index to 'refresh_tokens' for pruning
+
+Revision ID: 2d7e4b9a1c05
+Revises: f1c6a0b83d59
+Create Date: 2026-10-18 23:37:52.104618
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2d7e4b9a1c05"
+down_revision: Union[str, None] = "f1c6a0b83d59"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_refresh_tokens_expires_at"
+
+
+def _drop_invalid_indexes(index_names: Sequence[str]) -> None:
+    # Leftovers of an interrupted concurrent build; IF NOT EXISTS would
+    # keep them as they are.
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = ANY(:names) "
+                "AND c.relnamespace = current_schema()::regnamespace "
+                "AND NOT i.indisvalid"
+            ),
+            {"names": list(index_names)},
+        )
+        .scalars()
+    )
+    for index_name in invalid.all():
+        op.drop_index(
+            index_name,
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        _drop_invalid_indexes((INDEX_NAME,))
+        op.create_index(
+            INDEX_NAME,
+            "refresh_tokens",
+            ["expires_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,137 @@
+"""Added indexes to 'users': lower(email), active users, roles
+
+Revision ID: 5b1f0c7d2e94
+Revises: 842d3ea30980
+Create Date: 2026-10-18 10:12:41.318207
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f0c7d2e94"
+down_revision: Union[str, None] = "842d3ea30980"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAMES = (
+    "ix_users_email_lower",
+    "ix_users_active_user_id",
+    "ix_users_roles_gin",
+)
+
+# Conflicting emails listed when the unique index cannot be built.
+MAX_REPORTED_DUPLICATES = 20
+
+
+def _check_duplicate_emails() -> None:
+    # The baseline only kept emails unique as typed, so rows differing in
+    # case would make the unique lower(email) build fail after a full scan
+    # and leave an INVALID index behind. They have to be merged by hand:
+    # keep one account per address, reassign or deactivate the others and
+    # change their emails, then run the upgrade again.
+    duplicates = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT lower(email) FROM users "
+                "GROUP BY 1 HAVING count(*) > 1 ORDER BY 1"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if duplicates:
+        listed = ", ".join(duplicates[:MAX_REPORTED_DUPLICATES])
+        if len(duplicates) > MAX_REPORTED_DUPLICATES:
+            listed += f" and {len(duplicates) - MAX_REPORTED_DUPLICATES} more"
+        raise RuntimeError(
+            "Cannot create unique index ix_users_email_lower, these emails "
+            "belong to several users when compared case-insensitively: "
+            f"{listed}. Merge those users and run the upgrade again."
+        )
+
+
+def _drop_invalid_indexes(index_names: Sequence[str]) -> None:
+    # A failed or cancelled CREATE INDEX CONCURRENTLY leaves an INVALID
+    # index behind, which IF NOT EXISTS would then keep forever. Drop
+    # those so the build below starts over.
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = ANY(:names) "
+                "AND c.relnamespace = current_schema()::regnamespace "
+                "AND NOT i.indisvalid"
+            ),
+            {"names": list(index_names)},
+        )
+        .scalars()
+    )
+    for index_name in invalid.all():
+        op.drop_index(
+            index_name,
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_duplicate_emails()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        _drop_invalid_indexes(INDEX_NAMES)
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_active_user_id",
+            "users",
+            ["user_id"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_roles_gin",
+            "users",
+            ["roles"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_roles_gin",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_users_active_user_id",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_users_email_lower",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,152 @@
+"""Added 'roles_mask' to 'users'
+
+Revision ID: a3c9e51f7b20
+Revises: 637618292d5b
+Create Date: 2026-10-18 16:40:08.214733
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c9e51f7b20"
+down_revision: Union[str, None] = "637618292d5b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5_000
+
+# USER = 1, ADMIN = 2, SUPERADMIN = 4; frozen here on purpose, the model
+# may grow new roles later.
+ROLES_MASK_EXPRESSION = (
+    "(CASE WHEN 'USER' = ANY({roles}) THEN 1 ELSE 0 END)"
+    " | (CASE WHEN 'ADMIN' = ANY({roles}) THEN 2 ELSE 0 END)"
+    " | (CASE WHEN 'SUPERADMIN' = ANY({roles}) THEN 4 ELSE 0 END)"
+)
+
+
+def _drop_invalid_indexes(index_names: Sequence[str]) -> None:
+    # Leftovers of an interrupted concurrent build; IF NOT EXISTS would
+    # keep them as they are.
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = ANY(:names) "
+                "AND c.relnamespace = current_schema()::regnamespace "
+                "AND NOT i.indisvalid"
+            ),
+            {"names": list(index_names)},
+        )
+        .scalars()
+    )
+    for index_name in invalid.all():
+        op.drop_index(
+            index_name,
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is metadata-only, so this does not rewrite users.
+    op.add_column(
+        "users",
+        sa.Column(
+            "roles_mask",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    # Writers keep updating the roles array; the trigger mirrors every
+    # change so rows touched during the backfill stay correct.
+    op.execute(
+        "CREATE OR REPLACE FUNCTION users_sync_roles_mask() "
+        "RETURNS trigger AS $$ BEGIN "
+        f"NEW.roles_mask := {ROLES_MASK_EXPRESSION.format(roles='NEW.roles')}; "
+        "RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        "CREATE TRIGGER users_sync_roles_mask "
+        "BEFORE INSERT OR UPDATE OF roles ON users "
+        "FOR EACH ROW EXECUTE FUNCTION users_sync_roles_mask()"
+    )
+
+    # Backfill in user_id order, committing each chunk so row locks stay
+    # short and the work survives an interrupted run.
+    backfill = sa.text(
+        f"""
+        WITH chunk AS (
+            SELECT user_id FROM users
+            WHERE user_id > :after_user_id
+            ORDER BY user_id
+            LIMIT :batch_size
+        ), updated AS (
+            UPDATE users
+            SET roles_mask = {ROLES_MASK_EXPRESSION.format(roles="roles")}
+            FROM chunk
+            WHERE users.user_id = chunk.user_id
+            RETURNING users.user_id
+        )
+        SELECT max(user_id::text)::uuid FROM updated
+        """
+    )
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        after_user_id = "00000000-0000-0000-0000-000000000000"
+        while after_user_id is not None:
+            after_user_id = connection.execute(
+                backfill,
+                {
+                    "after_user_id": after_user_id,
+                    "batch_size": BACKFILL_BATCH_SIZE,
+                },
+            ).scalar()
+
+        _drop_invalid_indexes(
+            ("ix_users_admin_user_id", "ix_users_superadmin_user_id")
+        )
+        op.create_index(
+            "ix_users_admin_user_id",
+            "users",
+            ["user_id"],
+            postgresql_where=sa.text("(roles_mask & 2) != 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_superadmin_user_id",
+            "users",
+            ["user_id"],
+            postgresql_where=sa.text("(roles_mask & 4) != 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_superadmin_user_id",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_users_admin_user_id",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute("DROP TRIGGER IF EXISTS users_sync_roles_mask ON users")
+    op.execute("DROP FUNCTION IF EXISTS users_sync_roles_mask()")
+    op.drop_column("users", "roles_mask")
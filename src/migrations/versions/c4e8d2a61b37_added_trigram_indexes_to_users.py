@@ -0,0 +1,103 @@
+"""Added pg_trgm indexes to 'users' for search
+
+Revision ID: c4e8d2a61b37
+Revises: a3c9e51f7b20
+Create Date: 2026-10-18 18:21:54.903126
+
+"""
+
+from logging import getLogger
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8d2a61b37"
+down_revision: Union[str, None] = "a3c9e51f7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = getLogger("alembic.runtime.migration")
+
+# Not part of the model metadata: create_all must work on servers
+# without the contrib extensions. env.py keeps autogenerate off them.
+TRIGRAM_INDEXES = {
+    "ix_users_trgm_name": "name",
+    "ix_users_trgm_surname": "surname",
+    "ix_users_trgm_email": "email",
+}
+
+
+def _drop_invalid_indexes(index_names: Sequence[str]) -> None:
+    # Leftovers of an interrupted concurrent build; IF NOT EXISTS would
+    # keep them as they are.
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = ANY(:names) "
+                "AND c.relnamespace = current_schema()::regnamespace "
+                "AND NOT i.indisvalid"
+            ),
+            {"names": list(index_names)},
+        )
+        .scalars()
+    )
+    for index_name in invalid.all():
+        op.drop_index(
+            index_name,
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    available = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT EXISTS (SELECT 1 FROM pg_available_extensions "
+                "WHERE name = 'pg_trgm')"
+            )
+        )
+        .scalar()
+    )
+    if not available:
+        # User search still works, as unindexed substring matching.
+        logger.warning(
+            "pg_trgm is not available on this server; skipping the user "
+            "search indexes. Install postgresql-contrib and rerun this "
+            "revision to get them."
+        )
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        _drop_invalid_indexes(tuple(TRIGRAM_INDEXES))
+        for index_name, column in TRIGRAM_INDEXES.items():
+            op.create_index(
+                index_name,
+                "users",
+                [sa.text(f"lower({column}) gin_trgm_ops")],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The extension stays: other objects may have come to depend on it.
+    with op.get_context().autocommit_block():
+        for index_name in reversed(TRIGRAM_INDEXES):
+            op.drop_index(
+                index_name,
+                table_name="users",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,94 @@
+"""Added 'user_counters' table maintained by triggers on 'users'
+
+Revision ID: e7b3f90c4d12
+Revises: c4e8d2a61b37
+Create Date: 2026-10-18 20:07:33.472915
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b3f90c4d12"
+down_revision: Union[str, None] = "c4e8d2a61b37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_DELTAS_UPSERT = (
+    "INSERT INTO user_counters AS counter "
+    "(roles_mask, is_active, shard, count) "
+    "SELECT roles_mask, is_active, counter_shard, sum(delta) "
+    "FROM ({changes}) AS changes "
+    "GROUP BY roles_mask, is_active HAVING sum(delta) <> 0 "
+    "ORDER BY roles_mask, is_active "
+    "ON CONFLICT (roles_mask, is_active, shard) "
+    "DO UPDATE SET count = counter.count + excluded.count;"
+)
+NEW_ROWS = "SELECT roles_mask, is_active, 1 AS delta FROM new_rows"
+OLD_ROWS = "SELECT roles_mask, is_active, -1 AS delta FROM old_rows"
+
+COUNT_TRIGGERS = {
+    "users_count_inserts": (
+        "AFTER INSERT ON users REFERENCING NEW TABLE AS new_rows"
+    ),
+    "users_count_updates": (
+        "AFTER UPDATE ON users "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"
+    ),
+    "users_count_deletes": (
+        "AFTER DELETE ON users REFERENCING OLD TABLE AS old_rows"
+    ),
+    "users_count_truncates": "AFTER TRUNCATE ON users",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_counters",
+        sa.Column("roles_mask", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("shard", sa.SmallInteger(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("roles_mask", "is_active", "shard"),
+    )
+    op.execute(
+        "CREATE OR REPLACE FUNCTION users_count_changes() "
+        "RETURNS trigger AS $$ DECLARE "
+        "counter_shard smallint := floor(random() * 16); "
+        "BEGIN "
+        "IF TG_OP = 'TRUNCATE' THEN DELETE FROM user_counters; "
+        "ELSIF TG_OP = 'INSERT' THEN "
+        f"{COUNT_DELTAS_UPSERT.format(changes=NEW_ROWS)} "
+        "ELSIF TG_OP = 'DELETE' THEN "
+        f"{COUNT_DELTAS_UPSERT.format(changes=OLD_ROWS)} "
+        "ELSE "
+        + COUNT_DELTAS_UPSERT.format(
+            changes=f"{NEW_ROWS} UNION ALL {OLD_ROWS}"
+        )
+        + " END IF; RETURN NULL; END $$ LANGUAGE plpgsql"
+    )
+    # CREATE TRIGGER holds a lock that blocks writes to users until this
+    # transaction commits, so the snapshot counted below cannot drift
+    # from what the triggers record afterwards.
+    for trigger_name, timing in COUNT_TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {trigger_name} {timing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION users_count_changes()"
+        )
+    op.execute(
+        "INSERT INTO user_counters (roles_mask, is_active, shard, count) "
+        "SELECT roles_mask, is_active, 0, count(*) FROM users "
+        "GROUP BY roles_mask, is_active"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger_name in reversed(COUNT_TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger_name} ON users")
+    op.execute("DROP FUNCTION IF EXISTS users_count_changes()")
+    op.drop_table("user_counters")
@@ -0,0 +1,76 @@
+"""Added text_pattern_ops indexes to 'users' for search
+
+Revision ID: f1c6a0b83d59
+Revises: e7b3f90c4d12
+Create Date: 2026-10-18 22:41:16.530284
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c6a0b83d59"
+down_revision: Union[str, None] = "e7b3f90c4d12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PATTERN_INDEXES = {
+    "ix_users_name_lower_pattern": "name",
+    "ix_users_surname_lower_pattern": "surname",
+    "ix_users_email_lower_pattern": "email",
+}
+
+
+def _drop_invalid_indexes(index_names: Sequence[str]) -> None:
+    # Leftovers of an interrupted concurrent build; IF NOT EXISTS would
+    # keep them as they are.
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = ANY(:names) "
+                "AND c.relnamespace = current_schema()::regnamespace "
+                "AND NOT i.indisvalid"
+            ),
+            {"names": list(index_names)},
+        )
+        .scalars()
+    )
+    for index_name in invalid.all():
+        op.drop_index(
+            index_name,
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        _drop_invalid_indexes(tuple(PATTERN_INDEXES))
+        for index_name, column in PATTERN_INDEXES.items():
+            op.create_index(
+                index_name,
+                "users",
+                [sa.text(f"lower({column}) text_pattern_ops")],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name in reversed(PATTERN_INDEXES):
+            op.drop_index(
+                index_name,
+                table_name="users",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,8 +1,14 @@
+import hashlib
+import secrets
 from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
 from jose import jwt
 
 from src.config import auth_settings
+from src.metrics import ACCESS_TOKEN_SECONDS
+
+REFRESH_TOKEN_TYPE = "refresh"
 
 
 def create_access_token(
@@ -17,7 +23,38 @@ def create_access_token(
         expire += timedelta(minutes=auth_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, auth_settings.SECRET_KEY, algorithm=auth_settings.ALGORITHM
-    )
+    with ACCESS_TOKEN_SECONDS.time():
+        encoded_jwt = jwt.encode(
+            to_encode,
+            auth_settings.SECRET_KEY,
+            algorithm=auth_settings.ALGORITHM,
+        )
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(
+        token, auth_settings.SECRET_KEY, algorithms=[auth_settings.ALGORITHM]
+    )
+
+
+def create_refresh_token(user_id: UUID) -> tuple[str, bytes, datetime]:
+    jti = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        days=auth_settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    token = jwt.encode(
+        {
+            "sub": str(user_id),
+            "jti": jti,
+            "typ": REFRESH_TOKEN_TYPE,
+            "exp": expires_at,
+        },
+        auth_settings.SECRET_KEY,
+        algorithm=auth_settings.ALGORITHM,
+    )
+    return token, hash_token_id(jti), expires_at
+
+
+def hash_token_id(jti: str) -> bytes:
+    return hashlib.sha256(jti.encode()).digest()
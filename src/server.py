@@ -0,0 +1,197 @@
+import gc
+import glob
+import importlib.util
+import os
+import signal
+import socket
+import time
+from logging import getLogger
+
+import uvicorn
+from fastapi import FastAPI
+from prometheus_client import multiprocess
+
+from src.config import settings
+from src.metrics import MULTIPROC_DIR_ENV
+
+logger = getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 0.1
+RESPAWN_DELAY_SECONDS = 1.0
+MAX_RESPAWN_DELAY_SECONDS = 30.0
+# Workers dying sooner than this after start count as a crash loop.
+WORKER_MIN_UPTIME_SECONDS = 10.0
+MAX_FAST_CRASHES = 5
+
+
+def run(app: FastAPI) -> None:
+    workers = settings.APP_WORKERS_COUNT
+    if settings.APP_MODE == "prod" and not hasattr(os, "fork"):
+        logger.warning("os.fork is unavailable, serving from one process")
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        _reset_metrics_dir(os.environ[MULTIPROC_DIR_ENV])
+    elif workers > 1:
+        logger.warning(
+            "%s is not set, /metrics will only report the worker serving it",
+            MULTIPROC_DIR_ENV,
+        )
+
+    if workers == 1:
+        uvicorn.run(app, **_get_server_options())
+        return
+
+    sock = _bind_socket()
+    # The app is already imported; freezing moves its objects out of the
+    # collector's reach so workers keep sharing those pages after fork.
+    gc.collect()
+    gc.freeze()
+    _supervise(app, sock, workers)
+
+
+def _reset_metrics_dir(path: str) -> None:
+    # Files of a previous run would be summed with the live ones; this
+    # process has already created its own while importing the app.
+    own_suffix = f"_{os.getpid()}.db"
+    for name in glob.glob(os.path.join(path, "*.db")):
+        if not name.endswith(own_suffix):
+            os.remove(name)
+
+
+def _get_server_options() -> dict:
+    return {
+        "host": settings.APP_HOST,
+        "port": settings.APP_PORT,
+        "loop": "uvloop" if _is_installed("uvloop") else "asyncio",
+        "http": "httptools" if _is_installed("httptools") else "h11",
+        "timeout_graceful_shutdown": settings.APP_GRACEFUL_TIMEOUT_SECONDS,
+    }
+
+
+def _is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _bind_socket() -> socket.socket:
+    family = socket.AF_INET6 if ":" in settings.APP_HOST else socket.AF_INET
+    sock = socket.socket(family)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.APP_HOST, settings.APP_PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _spawn_worker(app: FastAPI, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(app, **_get_server_options()))
+        server.run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker %s crashed", os.getpid())
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def _supervise(app: FastAPI, sock: socket.socket, workers: int) -> None:
+    stopping = False
+    killed = False
+    gave_up = False
+
+    def _stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            _kill(pid, signal.SIGTERM)
+
+    # pid -> start time, to tell crash loops from occasional failures.
+    children = {
+        _spawn_worker(app, sock): time.monotonic() for _ in range(workers)
+    }
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info(
+        "Serving on %s:%s with %s workers",
+        settings.APP_HOST,
+        settings.APP_PORT,
+        workers,
+    )
+
+    deadline = None
+    fast_crashes = 0
+    respawns = 0
+    respawn_at = 0.0
+    # Never block in waitpid: the graceful deadline and delayed respawns
+    # both need the loop to keep turning while workers are alive.
+    while children or (respawns and not stopping):
+        now = time.monotonic()
+        if stopping:
+            if deadline is None:
+                deadline = now + settings.APP_GRACEFUL_TIMEOUT_SECONDS
+            elif now > deadline and not killed:
+                logger.warning("Graceful shutdown timed out, killing workers")
+                for pid in children:
+                    _kill(pid, signal.SIGKILL)
+                killed = True
+        elif respawns and now >= respawn_at:
+            for _ in range(respawns):
+                children[_spawn_worker(app, sock)] = time.monotonic()
+            respawns = 0
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid == 0:
+            time.sleep(POLL_INTERVAL_SECONDS)
+            continue
+
+        started_at = children.pop(pid, None)
+        if os.environ.get(MULTIPROC_DIR_ENV):
+            multiprocess.mark_process_dead(pid)
+        if stopping or started_at is None:
+            continue
+
+        if now - started_at < WORKER_MIN_UPTIME_SECONDS:
+            fast_crashes += 1
+        else:
+            fast_crashes = 0
+        if fast_crashes > MAX_FAST_CRASHES:
+            logger.error(
+                "Workers crashed %s times in a row shortly after start, "
+                "shutting down",
+                fast_crashes,
+            )
+            gave_up = True
+            _stop(None, None)
+            continue
+
+        delay = min(
+            RESPAWN_DELAY_SECONDS * 2 ** max(fast_crashes - 1, 0),
+            MAX_RESPAWN_DELAY_SECONDS,
+        )
+        logger.warning(
+            "Worker %s exited with status %s, restarting in %.1fs",
+            pid,
+            status,
+            delay,
+        )
+        respawns += 1
+        respawn_at = now + delay
+
+    sock.close()
+    if gave_up:
+        raise SystemExit(1)
+
+
+def _kill(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
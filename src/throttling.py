@@ -0,0 +1,154 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from src.config import auth_settings
+
+
+class TokenBucketLimiter:
+    def __init__(self, capacity: int, window_seconds: float, maxsize: int):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.refill_rate = capacity / window_seconds if capacity else 0.0
+        self.maxsize = maxsize
+        self.rejected = 0
+        self.evictions = 0
+        # key -> [tokens, updated_at]; ordered by last use so idle keys
+        # are always at the front.
+        self._buckets: OrderedDict[Hashable, list[float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get_retry_after(self, key: Hashable, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+
+        tokens = self._get_tokens(key, now)
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.refill_rate
+
+    def consume(self, key: Hashable, now: float) -> None:
+        if not self.capacity:
+            return
+
+        tokens = self._get_tokens(key, now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [tokens - 1, now]
+        else:
+            bucket[0] = tokens - 1
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self, key: Hashable) -> None:
+        self._buckets.pop(key, None)
+
+    def evict_idle(self, now: float) -> None:
+        # A bucket idle long enough to refill completely behaves exactly
+        # like a missing one, so it can be dropped.
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self.window_seconds:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._buckets),
+            "maxsize": self.maxsize,
+            "capacity": self.capacity,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+    def _get_tokens(self, key: Hashable, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return float(self.capacity)
+        tokens, updated_at = bucket
+        return min(
+            self.capacity, tokens + (now - updated_at) * self.refill_rate
+        )
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        attempts_per_email: int,
+        attempts_per_ip: int,
+        window_seconds: float,
+        maxsize: int,
+        sweep_interval_seconds: float,
+    ):
+        self.by_email = TokenBucketLimiter(
+            attempts_per_email, window_seconds, maxsize
+        )
+        self.by_ip = TokenBucketLimiter(
+            attempts_per_ip, window_seconds, maxsize
+        )
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._swept_at = time.monotonic()
+
+    # Every attempt counts against the client IP. Only failed ones count
+    # against the email, and only from the IP they came from, so nobody
+    # can lock an account out by guessing its password from elsewhere.
+    def acquire(self, email: str, client_ip: str | None) -> float:
+        now = time.monotonic()
+        if now - self._swept_at >= self.sweep_interval_seconds:
+            self.by_email.evict_idle(now)
+            self.by_ip.evict_idle(now)
+            self._swept_at = now
+
+        limits = [(self.by_email, self._get_email_key(email, client_ip))]
+        if client_ip is not None:
+            limits.append((self.by_ip, client_ip))
+
+        retry_after = 0.0
+        for limiter, key in limits:
+            if limiter_retry_after := limiter.get_retry_after(key, now):
+                limiter.rejected += 1
+                retry_after = max(retry_after, limiter_retry_after)
+        if retry_after:
+            return retry_after
+
+        if client_ip is not None:
+            self.by_ip.consume(client_ip, now)
+        return 0.0
+
+    def record_failure(self, email: str, client_ip: str | None) -> None:
+        self.by_email.consume(
+            self._get_email_key(email, client_ip), time.monotonic()
+        )
+
+    def record_success(self, email: str, client_ip: str | None) -> None:
+        self.by_email.reset(self._get_email_key(email, client_ip))
+
+    @staticmethod
+    def _get_email_key(email: str, client_ip: str | None) -> tuple:
+        return email.lower(), client_ip
+
+    def clear(self) -> None:
+        self.by_email.clear()
+        self.by_ip.clear()
+
+    def stats(self) -> dict:
+        return {"email": self.by_email.stats(), "ip": self.by_ip.stats()}
+
+
+login_throttle = LoginThrottle(
+    attempts_per_email=auth_settings.LOGIN_ATTEMPTS_PER_EMAIL,
+    attempts_per_ip=auth_settings.LOGIN_ATTEMPTS_PER_IP,
+    window_seconds=auth_settings.LOGIN_ATTEMPTS_WINDOW_SECONDS,
+    maxsize=auth_settings.LOGIN_THROTTLE_MAX_KEYS,
+    sweep_interval_seconds=auth_settings.LOGIN_THROTTLE_SWEEP_SECONDS,
+)
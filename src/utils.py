@@ -1,8 +1,64 @@
+import asyncio
+import base64
+import binascii
+import ipaddress
+import os
+import struct
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from logging import getLogger
+from typing import Any, Callable, Sequence
+from uuid import UUID
+
 from passlib.context import CryptContext
 
+from src.config import auth_settings
+from src.metrics import (
+    PASSWORD_HASH_PENDING,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_TIMER,
+    PASSWORD_VERIFY_TIMER,
+)
+
+logger = getLogger(__name__)
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _build_pwd_context(rounds: int | None = None) -> CryptContext:
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # Hashes below the configured cost are upgraded on the next login;
+    # stronger ones are left alone so calibration noise between restarts
+    # never downgrades them.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
 
 class PasswordHasher:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = _build_pwd_context()
+
+    _rounds: int | None = None
+    _executor: Executor | None = None
+    _pending: int = 0
+    _pending_lock = threading.Lock()
+    _rejected: int = 0
 
     @classmethod
     def verify_password(
@@ -13,3 +69,256 @@ class PasswordHasher:
     @classmethod
     def get_password_hash(cls, password: str) -> str:
         return cls.pwd_context.hash(password)
+
+    @classmethod
+    def verify_and_update(
+        cls, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return cls.pwd_context.verify_and_update(
+            plain_password, hashed_password
+        )
+
+    @classmethod
+    def configure(cls, rounds: int | None) -> None:
+        cls._rounds = rounds
+        cls.pwd_context = _build_pwd_context(rounds)
+        # Process workers hold their own copy of the context.
+        cls.shutdown()
+
+    @classmethod
+    def calibrate(cls) -> int:
+        if auth_settings.PASSWORD_HASH_ROUNDS:
+            rounds = auth_settings.PASSWORD_HASH_ROUNDS
+        else:
+            rounds = _calibrate_rounds(
+                target_seconds=auth_settings.PASSWORD_HASH_TARGET_MS / 1000,
+                min_rounds=auth_settings.PASSWORD_HASH_MIN_ROUNDS,
+                max_rounds=auth_settings.PASSWORD_HASH_MAX_ROUNDS,
+            )
+        cls.configure(rounds)
+        logger.info("Password hashing uses bcrypt cost %s", rounds)
+        return rounds
+
+    @classmethod
+    async def averify_password(
+        cls, plain_password: str, hashed_password: str
+    ) -> bool:
+        with PASSWORD_VERIFY_TIMER.time():
+            return await cls._run(
+                _verify_password, plain_password, hashed_password
+            )
+
+    @classmethod
+    async def averify_and_update(
+        cls, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        with PASSWORD_VERIFY_TIMER.time():
+            return await cls._run(
+                _verify_and_update, plain_password, hashed_password
+            )
+
+    @classmethod
+    async def ahash_password(cls, password: str) -> str:
+        with PASSWORD_HASH_TIMER.time():
+            return await cls._run(_get_password_hash, password)
+
+    @classmethod
+    async def ahash_many(cls, passwords: list[str]) -> list[str]:
+        hashed_passwords = []
+        window = cls._get_workers_count()
+        for start in range(0, len(passwords), window):
+            hashed_passwords.extend(
+                await asyncio.gather(
+                    *(
+                        cls.ahash_password(password)
+                        for password in passwords[start : start + window]
+                    )
+                )
+            )
+        return hashed_passwords
+
+    @classmethod
+    def capacity(cls) -> int:
+        return (
+            cls._get_workers_count() + auth_settings.PASSWORD_HASH_QUEUE_SIZE
+        )
+
+    @classmethod
+    def is_saturated(cls) -> bool:
+        return cls._pending >= cls.capacity()
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "rounds": cls.pwd_context.handler("bcrypt").default_rounds,
+            "workers": cls._get_workers_count(),
+            "capacity": cls.capacity(),
+            "pending": cls._pending,
+            "rejected": cls._rejected,
+            "saturated": cls.is_saturated(),
+        }
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    @classmethod
+    async def _run(cls, func: Callable[..., Any], *args: Any) -> Any:
+        if cls.is_saturated():
+            cls._rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            logger.warning(
+                "Password hasher saturated: %s pending of %s",
+                cls._pending,
+                cls.capacity(),
+            )
+            raise PasswordHasherBusyError("Password hasher is saturated.")
+
+        # A timed out job keeps running in its worker, so it stays pending
+        # until the executor reports it done rather than until we stop
+        # waiting for it.
+        with cls._pending_lock:
+            cls._pending += 1
+        try:
+            future = cls._get_executor().submit(func, *args)
+        except BaseException:
+            cls._release(None)
+            raise
+        future.add_done_callback(cls._release)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=auth_settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            raise PasswordHasherBusyError("Password hashing timed out.")
+
+    @classmethod
+    def _release(cls, future: Future | None) -> None:
+        # Usually runs on an executor thread.
+        with cls._pending_lock:
+            cls._pending -= 1
+
+    @classmethod
+    def _get_executor(cls) -> Executor:
+        if cls._executor is None:
+            workers = cls._get_workers_count()
+            if auth_settings.PASSWORD_HASH_EXECUTOR == "process":
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_configure_worker,
+                    initargs=(cls._rounds,),
+                )
+            else:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="password-hasher"
+                )
+        return cls._executor
+
+    @staticmethod
+    def _get_workers_count() -> int:
+        return auth_settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+PASSWORD_HASH_PENDING.set_function(lambda: PasswordHasher._pending)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return PasswordHasher.verify_password(plain_password, hashed_password)
+
+
+def _get_password_hash(password: str) -> str:
+    return PasswordHasher.get_password_hash(password)
+
+
+def _verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return PasswordHasher.verify_and_update(plain_password, hashed_password)
+
+
+def _configure_worker(rounds: int | None) -> None:
+    PasswordHasher.pwd_context = _build_pwd_context(rounds)
+
+
+def _calibrate_rounds(
+    target_seconds: float, min_rounds: int, max_rounds: int
+) -> int:
+    # Each extra bcrypt round doubles the work, so one measurement at the
+    # floor is enough to extrapolate; the best of a few runs filters out
+    # scheduler noise.
+    context = _build_pwd_context(min_rounds)
+    elapsed = float("inf")
+    for _ in range(3):
+        started_at = time.perf_counter()
+        context.hash("calibration-password")
+        elapsed = min(elapsed, time.perf_counter() - started_at)
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed * 2 <= target_seconds:
+        elapsed *= 2
+        rounds += 1
+    return rounds
+
+
+def encode_cursor(user_id: UUID) -> str:
+    return base64.urlsafe_b64encode(user_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> UUID:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return UUID(bytes=raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+
+
+def encode_search_cursor(rank: float, user_id: UUID) -> str:
+    raw = struct.pack(">d", rank) + user_id.bytes
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (rank,) = struct.unpack(">d", raw[:8])
+        return rank, UUID(bytes=raw[8:])
+    except (binascii.Error, struct.error, ValueError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+
+
+def get_client_ip(
+    peer: str | None,
+    forwarded_for: str | None,
+    trusted_proxies: Sequence[ipaddress.IPv4Network | ipaddress.IPv6Network],
+) -> str | None:
+    # Walk X-Forwarded-For from the nearest hop back and stop at the
+    # first address no trusted proxy vouches for; anything further left
+    # is whatever the client chose to send.
+    if (
+        peer is None
+        or not forwarded_for
+        or not _is_trusted(peer, trusted_proxies)
+    ):
+        return peer
+
+    client_ip = peer
+    for hop in reversed(forwarded_for.split(",")):
+        client_ip = hop.strip()
+        if not _is_trusted(client_ip, trusted_proxies):
+            break
+    return client_ip
+
+
+def _is_trusted(
+    address: str,
+    trusted_proxies: Sequence[ipaddress.IPv4Network | ipaddress.IPv6Network],
+) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from typing import List
 
@@ -14,10 +15,17 @@ from sqlalchemy.ext.asyncio import (
 
 from main import app
 from src.api.actions.auth import auth_settings
+from src.cache import principal_cache, token_cache
 from src.config import settings
-from src.db.database import get_db_session
+from src.db.database import (
+    get_db_read_session,
+    get_db_read_session_scope,
+    get_db_session,
+)
+from src.db.instrumentation import instrument_engine
 from src.db.models import BaseEntity, PortalRole
 from src.security import create_access_token
+from src.throttling import login_throttle
 
 
 @pytest.fixture(scope="session")
@@ -32,6 +40,7 @@ async def engine_fixture():
     test_async_engine = create_async_engine(
         settings.TEST_DATABASE_URL, future=True
     )
+    instrument_engine(test_async_engine, "test")
 
     async with test_async_engine.begin() as conn:
         await conn.run_sync(BaseEntity.metadata.create_all)
@@ -49,12 +58,33 @@ async def session_fixture(engine: AsyncEngine):
         yield session
 
 
+@pytest.fixture
+async def autocommit_session():
+    # The application's engines run in AUTOCOMMIT, so only an explicit
+    # transaction makes several statements atomic there.
+    engine = create_async_engine(
+        settings.TEST_DATABASE_URL,
+        execution_options={"isolation_level": "AUTOCOMMIT"},
+    )
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
 @pytest.fixture(name="client", scope="function")
 async def client_fixture(session: AsyncSession):
     async def __override_db_session():
         yield session
 
+    @asynccontextmanager
+    async def __override_session_scope():
+        yield session
+
     app.dependency_overrides[get_db_session] = __override_db_session
+    app.dependency_overrides[get_db_read_session] = __override_db_session
+    app.dependency_overrides[get_db_read_session_scope] = lambda: (
+        __override_session_scope
+    )
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -74,9 +104,13 @@ async def asyncpg_pool():
 
 
 @pytest.fixture(autouse=True)
-async def clean_tables(asyncpg_pool):
+async def clean_tables(asyncpg_pool, engine):
     yield
 
+    principal_cache.clear()
+    token_cache.clear()
+    login_throttle.clear()
+
     async with asyncpg_pool.acquire() as conn:
         await conn.execute(
             """TRUNCATE TABLE users RESTART IDENTITY CASCADE;"""
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+from src.cache import ExpiringCache, PrincipalCache, TTLCache
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("src.cache.time.monotonic", lambda: now)
+    cache = TTLCache(maxsize=10, ttl=30)
+
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    now += 31
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=30)
+
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_principal_cache_invalidates_by_user_id():
+    cache = PrincipalCache(maxsize=10, ttl=30)
+    user = SimpleNamespace(user_id=uuid4())
+    other_user = SimpleNamespace(user_id=uuid4())
+
+    cache.set("lol@kek.com", user)
+    cache.set("ivan@kek.com", other_user)
+    cache.invalidate_user(user.user_id)
+
+    assert cache.get("lol@kek.com") is None
+    assert cache.get("ivan@kek.com") is other_user
+
+
+def test_principal_cache_drops_previous_subject_of_user():
+    cache = PrincipalCache(maxsize=10, ttl=30)
+    user = SimpleNamespace(user_id=uuid4())
+
+    cache.set("old@kek.com", user)
+    cache.set("new@kek.com", user)
+
+    assert cache.get("old@kek.com") is None
+    assert cache.get("new@kek.com") is user
+
+
+def test_expiring_cache_honours_entry_expiry(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("src.cache.time.time", lambda: now)
+    cache = ExpiringCache(maxsize=10)
+
+    cache.set("short", 1, expires_at=1010)
+    cache.set("long", 2, expires_at=1100)
+    cache.set("expired", 3, expires_at=1000)
+    assert cache.get("short") == 1
+    assert cache.get("expired") is None
+
+    now = 1050.0
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert len(cache) == 1
+
+
+def test_expiring_cache_evicts_soonest_expiring_when_full(monkeypatch):
+    monkeypatch.setattr("src.cache.time.time", lambda: 1000.0)
+    cache = ExpiringCache(maxsize=2)
+
+    cache.set("first", 1, expires_at=1100)
+    cache.set("second", 2, expires_at=1050)
+    cache.set("first", 3, expires_at=1200)
+    cache.set("third", 4, expires_at=1300)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 3
+    assert cache.get("third") == 4
+    assert cache.stats()["evictions"] == 1
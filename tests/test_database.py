@@ -0,0 +1,145 @@
+import json
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from src.config import auth_settings, settings
+from src.db.models import PortalRole
+from src.db.pool import InstrumentedAsyncQueuePool
+from src.security import create_access_token
+
+USER_DATA = {
+    "user_id": uuid4(),
+    "name": "Ivan",
+    "surname": "Ivanov",
+    "email": "ivan@kek.com",
+    "is_active": True,
+    "hashed_password": "SampleHashedPass",
+    "roles": [PortalRole.SUPERADMIN],
+}
+
+
+@pytest.fixture(name="pool")
+async def pool_fixture(monkeypatch):
+    engine = create_async_engine(
+        settings.TEST_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool
+    )
+    monkeypatch.setattr(
+        "src.db.database.async_session_maker",
+        async_sessionmaker(engine, expire_on_commit=False),
+    )
+    yield engine.pool
+    await engine.dispose()
+
+
+@pytest.fixture(name="app_client")
+async def app_client_fixture(pool):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as test_client:
+        yield test_client
+
+
+def _stateless_auth_header() -> dict[str, str]:
+    access_token = create_access_token(
+        data={
+            "sub": USER_DATA["email"],
+            "uid": str(USER_DATA["user_id"]),
+            "rol": [role.value for role in USER_DATA["roles"]],
+            "act": True,
+        },
+        expires_delta=timedelta(minutes=5),
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.mark.parametrize(
+    "method, url, kwargs, expected_status",
+    (
+        pytest.param(
+            "GET",
+            "/user/",
+            {"params": {"user_id": uuid4()}, "headers": {}},
+            401,
+            id="no_jwt",
+        ),
+        pytest.param(
+            "GET",
+            "/user/",
+            {
+                "params": {"user_id": uuid4()},
+                "headers": {"Authorization": "Bearer bad"},
+            },
+            401,
+            id="bad_jwt",
+        ),
+        pytest.param(
+            "PATCH",
+            "/user/",
+            {"params": {"user_id": USER_DATA["user_id"]}, "json": {}},
+            422,
+            id="empty_update",
+        ),
+        pytest.param(
+            "PATCH",
+            "/user/admin_privilege",
+            {"params": {"user_id": USER_DATA["user_id"]}},
+            400,
+            id="privileges_of_itself",
+        ),
+    ),
+)
+async def test_rejected_requests_do_not_check_out_connections(
+    app_client: AsyncClient,
+    pool,
+    monkeypatch,
+    method,
+    url,
+    kwargs,
+    expected_status,
+):
+    monkeypatch.setattr(auth_settings, "AUTH_STATELESS_TOKENS", True)
+    kwargs.setdefault("headers", _stateless_auth_header())
+
+    response = await app_client.request(method, url, **kwargs)
+
+    assert response.status_code == expected_status
+    assert pool.checkouts == 0
+
+
+async def test_connection_is_returned_after_request(
+    app_client: AsyncClient, pool, create_user_in_database
+):
+    await create_user_in_database(**USER_DATA)
+
+    response = await app_client.get(
+        "/user/",
+        params={"user_id": USER_DATA["user_id"]},
+        headers=_stateless_auth_header(),
+    )
+
+    assert response.status_code == 200
+    assert pool.checkouts >= 1
+    assert pool.checkedout() == 0
+
+
+async def test_export_streams_from_its_own_session(
+    app_client: AsyncClient, pool, monkeypatch, create_user_in_database
+):
+    monkeypatch.setattr(auth_settings, "AUTH_STATELESS_TOKENS", True)
+    await create_user_in_database(**USER_DATA)
+
+    response = await app_client.get(
+        "/user/export", headers=_stateless_auth_header()
+    )
+
+    assert response.status_code == 200
+    assert [
+        json.loads(line)["email"] for line in response.text.splitlines()
+    ] == [USER_DATA["email"]]
+    assert pool.checkouts == 1
+    assert pool.checkedout() == 0
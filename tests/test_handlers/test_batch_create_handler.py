@@ -0,0 +1,192 @@
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+ADMIN_DATA = {
+    "user_id": uuid4(),
+    "name": "Ivan",
+    "surname": "Ivanov",
+    "email": "ivan@kek.com",
+    "is_active": True,
+    "hashed_password": "SampleHashedPass",
+    "roles": [PortalRole.USER, PortalRole.ADMIN],
+}
+
+
+async def test_create_users_batch_from_json_array(
+    client: AsyncClient, create_user_in_database, get_user_from_database
+):
+    await create_user_in_database(**ADMIN_DATA)
+    rows = [
+        {
+            "name": "Alex",
+            "surname": "Sokol",
+            "email": "alex@kek.com",
+            "password": "pass",
+        },
+        {
+            "name": "Alex1",
+            "surname": "Sokol",
+            "email": "invalid@kek.com",
+            "password": "pass",
+        },
+        {
+            "name": "Petr",
+            "surname": "Petrov",
+            "email": ADMIN_DATA["email"],
+            "password": "pass",
+        },
+        {
+            "name": "Sasha",
+            "surname": "Sokol",
+            "email": "alex@kek.com",
+            "password": "pass",
+        },
+        {"name": "Oleg"},
+    ]
+
+    response = await client.post(
+        "/user/batch",
+        json=rows,
+        headers=create_test_auth_header_for_user(ADMIN_DATA["email"]),
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["created"] == 1
+    assert [result["status"] for result in data["results"]] == [
+        "created",
+        "invalid",
+        "duplicate",
+        "duplicate",
+        "invalid",
+    ]
+    assert data["results"][1]["detail"] == "Name should contains only letters"
+
+    db_users = await get_user_from_database(data["results"][0]["user_id"])
+    assert len(db_users) == 1
+    created_user = dict(db_users[0])
+    assert created_user["email"] == "alex@kek.com"
+    assert created_user["roles"] == [PortalRole.USER]
+    assert created_user["hashed_password"] != "pass"
+
+
+async def test_create_users_batch_from_ndjson_stream(
+    client: AsyncClient, create_user_in_database
+):
+    await create_user_in_database(**ADMIN_DATA)
+    lines = [
+        json.dumps(
+            {
+                "name": "Alex",
+                "surname": "Sokol",
+                "email": "alex@kek.com",
+                "password": "pass",
+            }
+        ),
+        "{not json",
+        "",
+        json.dumps(
+            {
+                "name": "Petr",
+                "surname": "Petrov",
+                "email": "petr@kek.com",
+                "password": "pass",
+            }
+        ),
+    ]
+
+    response = await client.post(
+        "/user/batch",
+        content="\n".join(lines).encode(),
+        headers={
+            **create_test_auth_header_for_user(ADMIN_DATA["email"]),
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["created"] == 2
+    assert [result["status"] for result in data["results"]] == [
+        "created",
+        "invalid",
+        "created",
+    ]
+
+
+async def test_create_users_batch_forbidden_for_regular_user(
+    client: AsyncClient, create_user_in_database
+):
+    await create_user_in_database(**{**ADMIN_DATA, "roles": [PortalRole.USER]})
+
+    response = await client.post(
+        "/user/batch",
+        json=[],
+        headers=create_test_auth_header_for_user(ADMIN_DATA["email"]),
+    )
+
+    assert response.status_code == 403
+
+
+async def test_create_users_batch_rejects_non_array(
+    client: AsyncClient, create_user_in_database
+):
+    await create_user_in_database(**ADMIN_DATA)
+
+    response = await client.post(
+        "/user/batch",
+        json={"name": "Alex"},
+        headers=create_test_auth_header_for_user(ADMIN_DATA["email"]),
+    )
+
+    assert response.status_code == 422
+
+
+async def _stream_chunks(chunks: list[bytes]):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.parametrize(
+    "content_type, content",
+    (
+        pytest.param(
+            "application/json", b"[" + b" " * 2048 + b"]", id="json_array"
+        ),
+        pytest.param(
+            "application/x-ndjson", b"x" * 2048, id="ndjson_without_newlines"
+        ),
+        pytest.param(
+            "application/x-ndjson",
+            _stream_chunks([b"x" * 512] * 4),
+            id="ndjson_chunked",
+        ),
+    ),
+)
+async def test_create_users_batch_rejects_oversized_body(
+    client: AsyncClient,
+    create_user_in_database,
+    monkeypatch,
+    content_type,
+    content,
+):
+    await create_user_in_database(**ADMIN_DATA)
+    monkeypatch.setattr("src.api.actions.user.USER_BATCH_MAX_BYTES", 1024)
+
+    response = await client.post(
+        "/user/batch",
+        content=content,
+        headers={
+            **create_test_auth_header_for_user(ADMIN_DATA["email"]),
+            "Content-Type": content_type,
+        },
+    )
+
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Batch is limited to 1024 bytes"}
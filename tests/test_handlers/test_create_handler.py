@@ -1,5 +1,10 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import settings
+from src.db import database
+from src.db.replicas import Replica, ReplicaSet
 
 
 async def test_create_user(client: AsyncClient, get_user_from_database):
@@ -219,3 +224,46 @@ async def test_create_user_validation_error(
     response = await client.post("/user/", json=test_case["user_data"])
     assert response.status_code == test_case["expected_status_code"]
     assert response.json() == test_case["expected_detail"]
+
+
+async def test_create_user_case_variant_email_error(client: AsyncClient):
+    user_data = {
+        "name": "Alex",
+        "surname": "Sokol",
+        "email": "nice@example.com",
+        "password": "simple-password",
+    }
+    response = await client.post("/user/", json=user_data)
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/user/", json={**user_data, "email": "NICE@example.com"}
+    )
+
+    assert response.status_code == 503
+    assert "ix_users_email_lower" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("fast_json", [True, False])
+async def test_create_user_pins_reads_to_primary(
+    client: AsyncClient, monkeypatch, fast_json
+):
+    monkeypatch.setattr(settings, "APP_FAST_JSON", fast_json)
+    replica = Replica(create_async_engine(settings.TEST_DATABASE_URL))
+    monkeypatch.setattr(
+        database, "replica_set", ReplicaSet([replica], retry_seconds=30)
+    )
+    user_data = {
+        "name": "Alex",
+        "surname": "Sokol",
+        "email": "pinned@example.com",
+        "password": "simple-password",
+    }
+
+    response = await client.post("/user/", json=user_data)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == user_data["email"]
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{database.READ_PRIMARY_COOKIE}=")
+    await replica.engine.dispose()
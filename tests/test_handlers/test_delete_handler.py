@@ -3,6 +3,9 @@ from uuid import uuid4
 import pytest
 from httpx import AsyncClient
 
+from main import app
+from src.db.dals import RefreshTokenDAL
+from src.db.database import get_db_session
 from src.db.models import PortalRole
 from tests.conftest import create_test_auth_header_for_user
 
@@ -39,6 +42,47 @@ async def test_delete_user(
     assert user_from_db["user_id"] == user_data["user_id"]
 
 
+async def test_delete_user_rolls_back_when_revocation_fails(
+    client: AsyncClient,
+    autocommit_session,
+    create_user_in_database,
+    get_user_from_database,
+    monkeypatch,
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Alex",
+        "surname": "Shevchenko",
+        "email": "lol@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashPassword",
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+
+    async def _get_db_session():
+        yield autocommit_session
+
+    async def _revoke_user_tokens(self, user_id) -> int:
+        raise RuntimeError("revocation failed")
+
+    monkeypatch.setitem(
+        app.dependency_overrides, get_db_session, _get_db_session
+    )
+    monkeypatch.setattr(
+        RefreshTokenDAL, "revoke_user_tokens", _revoke_user_tokens
+    )
+    with pytest.raises(RuntimeError):
+        await client.delete(
+            url="/user/",
+            params={"user_id": user_data["user_id"]},
+            headers=create_test_auth_header_for_user(user_data["email"]),
+        )
+
+    [user_from_db] = await get_user_from_database(user_data["user_id"])
+    assert user_from_db["is_active"] is True
+
+
 @pytest.mark.parametrize(
     "test_case",
     [
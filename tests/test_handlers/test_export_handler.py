@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+
+async def _create_users(create_user_in_database) -> list[dict]:
+    users = [
+        {
+            "user_id": uuid4(),
+            "name": "Ivan",
+            "surname": "Ivanov",
+            "email": "ivan@kek.com",
+            "is_active": True,
+            "hashed_password": "SampleHashedPass",
+            "roles": [PortalRole.USER, PortalRole.ADMIN],
+        },
+        {
+            "user_id": uuid4(),
+            "name": "Petr",
+            "surname": "Petrov",
+            "email": "petr@kek.com",
+            "is_active": False,
+            "hashed_password": "SampleHashedPass",
+            "roles": [PortalRole.USER],
+        },
+    ]
+    for user_data in users:
+        await create_user_in_database(**user_data)
+    return users
+
+
+async def test_export_users_as_ndjson(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database)
+
+    response = await client.get(
+        "/user/export",
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["email"] for row in exported) == [
+        "ivan@kek.com",
+        "petr@kek.com",
+    ]
+    assert all("hashed_password" not in row for row in exported)
+    admin_row = next(row for row in exported if row["email"] == "ivan@kek.com")
+    assert admin_row == {
+        "user_id": str(users[0]["user_id"]),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "roles": ["USER", "ADMIN"],
+    }
+
+
+async def test_export_users_as_csv_with_filters(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database)
+
+    response = await client.get(
+        "/user/export",
+        params={
+            "format": "csv",
+            "columns": ["email", "roles"],
+            "is_active": False,
+        },
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        ["email", "roles"],
+        ["petr@kek.com", "USER"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "params, expected_status",
+    (
+        pytest.param({"columns": ["hashed_password"]}, 422, id="bad_column"),
+        pytest.param({"format": "xml"}, 422, id="bad_format"),
+    ),
+)
+async def test_export_users_validation_error(
+    client: AsyncClient, create_user_in_database, params, expected_status
+):
+    users = await _create_users(create_user_in_database)
+
+    response = await client.get(
+        "/user/export",
+        params=params,
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == expected_status
+
+
+async def test_export_users_forbidden_for_regular_user(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database)
+
+    response = await client.get(
+        "/user/export",
+        headers=create_test_auth_header_for_user(users[1]["email"]),
+    )
+
+    assert response.status_code == 403
@@ -183,3 +183,53 @@ async def test_get_user_authentication_scenarios(
         assert response.json() == test_case["expected_response"](user_data)
     else:
         assert response.json() == test_case["expected_response"]
+
+
+async def test_get_user_by_email_ignores_case(
+    client: AsyncClient, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "Lol@Kek.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": True,
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+
+    response = await client.get(
+        "/user/by-email",
+        params={"email": "lol@kek.com"},
+        headers=create_test_auth_header_for_user("LOL@KEK.COM"),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["user_id"] == str(user_data["user_id"])
+
+
+async def test_get_user_by_email_not_found(
+    client: AsyncClient, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": True,
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+
+    response = await client.get(
+        "/user/by-email",
+        params={"email": "missing@kek.com"},
+        headers=create_test_auth_header_for_user(user_data["email"]),
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "User with email missing@kek.com not found."
+    }
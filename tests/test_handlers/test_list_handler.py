@@ -0,0 +1,157 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+
+async def _create_users(create_user_in_database, count: int) -> list[dict]:
+    users = []
+    for index in range(count):
+        user_data = {
+            "user_id": uuid4(),
+            "name": "Vlad",
+            "surname": "Zelenka",
+            "email": f"user{index}@kek.com",
+            "hashed_password": "SampleHashPassword",
+            "is_active": index % 2 == 0,
+            "roles": (
+                [PortalRole.USER, PortalRole.ADMIN]
+                if index % 3 == 0
+                else [PortalRole.USER]
+            ),
+        }
+        await create_user_in_database(**user_data)
+        users.append(user_data)
+    return users
+
+
+async def test_list_users_walks_all_pages(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database, 7)
+    headers = create_test_auth_header_for_user(users[0]["email"])
+
+    seen_ids = []
+    params = {"limit": 3}
+    while True:
+        response = await client.get(
+            "/user/list", params=params, headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["users"]) <= 3
+        seen_ids.extend(user["user_id"] for user in data["users"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert seen_ids == sorted(str(user["user_id"]) for user in users)
+
+
+@pytest.mark.parametrize(
+    "params, expected_indexes",
+    (
+        pytest.param({"is_active": True}, [0, 2, 4, 6], id="active_only"),
+        pytest.param({"role": "ADMIN"}, [0, 3, 6], id="admins_only"),
+        pytest.param(
+            {"role": "ADMIN", "is_active": False}, [3], id="inactive_admins"
+        ),
+    ),
+)
+async def test_list_users_filters(
+    client: AsyncClient, create_user_in_database, params, expected_indexes
+):
+    users = await _create_users(create_user_in_database, 7)
+
+    response = await client.get(
+        "/user/list",
+        params=params,
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert {user["user_id"] for user in response.json()["users"]} == {
+        str(users[index]["user_id"]) for index in expected_indexes
+    }
+
+
+@pytest.mark.parametrize(
+    "params",
+    (
+        pytest.param({"cursor": "not-a-cursor"}, id="invalid_cursor"),
+        pytest.param({"limit": 0}, id="zero_limit"),
+        pytest.param({"limit": 101}, id="limit_over_cap"),
+    ),
+)
+async def test_list_users_validation_error(
+    client: AsyncClient, create_user_in_database, params
+):
+    users = await _create_users(create_user_in_database, 1)
+
+    response = await client.get(
+        "/user/list",
+        params=params,
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("count", ("exact", "maintained"))
+@pytest.mark.parametrize(
+    "params, expected_total",
+    (
+        pytest.param({}, 7, id="all"),
+        pytest.param({"is_active": True}, 4, id="active_only"),
+        pytest.param({"role": "ADMIN", "is_active": False}, 1, id="filtered"),
+    ),
+)
+async def test_list_users_counts_total(
+    client: AsyncClient,
+    create_user_in_database,
+    count,
+    params,
+    expected_total,
+):
+    users = await _create_users(create_user_in_database, 7)
+
+    response = await client.get(
+        "/user/list",
+        params={**params, "limit": 2, "count": count},
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["total"] == expected_total
+
+
+async def test_list_users_estimates_total(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database, 7)
+
+    response = await client.get(
+        "/user/list",
+        params={"count": "estimated", "role": "ADMIN"},
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["total"] >= 0
+
+
+async def test_list_users_skips_total_by_default(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(create_user_in_database, 1)
+
+    response = await client.get(
+        "/user/list",
+        headers=create_test_auth_header_for_user(users[0]["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["total"] is None
@@ -0,0 +1,443 @@
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+
+from src.api.actions.auth import build_token_claims, rotate_refresh_token
+from src.config import auth_settings, settings
+from src.db.dals import RefreshTokenDAL
+from src.db.models import PortalRole, UserEntity
+from src.security import create_access_token, decode_access_token
+from src.utils import PasswordHasher
+from tests.conftest import create_test_auth_header_for_user
+
+
+async def _create_user_and_login(client: AsyncClient) -> dict:
+    user_data = {
+        "name": "Alex",
+        "surname": "Sokol",
+        "email": "nice@example.com",
+        "password": "simple-password",
+    }
+    response = await client.post("/user/", json=user_data)
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/login/token",
+        data={
+            "username": user_data["email"],
+            "password": user_data["password"],
+        },
+    )
+    assert response.status_code == 200
+    return jwt.decode(
+        response.json()["access_token"],
+        auth_settings.SECRET_KEY,
+        algorithms=[auth_settings.ALGORITHM],
+    )
+
+
+async def test_login_for_access_token(client: AsyncClient):
+    payload = await _create_user_and_login(client)
+
+    assert payload["sub"] == "nice@example.com"
+    assert "uid" not in payload
+    assert "other_custom_data" not in payload
+
+
+async def test_login_invalid_password(client: AsyncClient):
+    await client.post(
+        "/user/",
+        json={
+            "name": "Alex",
+            "surname": "Sokol",
+            "email": "nice@example.com",
+            "password": "simple-password",
+        },
+    )
+
+    response = await client.post(
+        "/login/token",
+        data={"username": "nice@example.com", "password": "wrong"},
+    )
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid username or password"}
+
+
+async def test_login_issues_claims_in_stateless_mode(
+    client: AsyncClient, monkeypatch
+):
+    monkeypatch.setattr(auth_settings, "AUTH_STATELESS_TOKENS", True)
+
+    payload = await _create_user_and_login(client)
+
+    assert payload["sub"] == "nice@example.com"
+    assert payload["rol"] == [PortalRole.USER.value]
+    assert payload["act"] is True
+    assert payload["uid"]
+
+
+def test_stateless_claims_use_role_values(monkeypatch):
+    monkeypatch.setattr(auth_settings, "AUTH_STATELESS_TOKENS", True)
+    user = UserEntity(
+        user_id=uuid4(),
+        email="nice@example.com",
+        roles=[PortalRole.USER, PortalRole.ADMIN],
+        is_active=True,
+    )
+
+    claims = build_token_claims(user)
+
+    assert claims["rol"] == ["USER", "ADMIN"]
+
+
+async def test_stateless_principal_is_built_from_claims(
+    client: AsyncClient, create_user_in_database, monkeypatch
+):
+    monkeypatch.setattr(auth_settings, "AUTH_STATELESS_TOKENS", True)
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Michael",
+        "surname": "Jordan",
+        "email": "jordan@gmail.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": True,
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+    access_token = create_access_token(
+        data={
+            "sub": "not-in-database@kek.com",
+            "uid": str(uuid4()),
+            "rol": [PortalRole.USER.value],
+            "act": True,
+        },
+        expires_delta=timedelta(minutes=5),
+    )
+
+    response = await client.get(
+        "/user/",
+        params={"user_id": user_data["user_id"]},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["email"] == user_data["email"]
+
+
+async def test_login_throttled_before_password_check(
+    client: AsyncClient, monkeypatch
+):
+    await client.post(
+        "/user/",
+        json={
+            "name": "Alex",
+            "surname": "Sokol",
+            "email": "nice@example.com",
+            "password": "simple-password",
+        },
+    )
+    credentials = {"username": "nice@example.com", "password": "wrong"}
+    for _ in range(auth_settings.LOGIN_ATTEMPTS_PER_EMAIL):
+        response = await client.post("/login/token", data=credentials)
+        assert response.status_code == 401
+
+    async def _fail_verify(*args):
+        raise AssertionError("Password must not be checked when throttled")
+
+    monkeypatch.setattr(PasswordHasher, "averify_and_update", _fail_verify)
+    response = await client.post(
+        "/login/token",
+        data={"username": "NICE@example.com", "password": "simple-password"},
+    )
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many login attempts."}
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+async def test_login_failures_elsewhere_do_not_lock_out_account(
+    client: AsyncClient, monkeypatch
+):
+    monkeypatch.setattr(settings, "APP_TRUSTED_PROXIES", "127.0.0.1")
+    await client.post(
+        "/user/",
+        json={
+            "name": "Alex",
+            "surname": "Sokol",
+            "email": "nice@example.com",
+            "password": "simple-password",
+        },
+    )
+    attacker = {"X-Forwarded-For": "198.51.100.1"}
+    credentials = {"username": "nice@example.com", "password": "wrong"}
+    for _ in range(auth_settings.LOGIN_ATTEMPTS_PER_EMAIL):
+        response = await client.post(
+            "/login/token", data=credentials, headers=attacker
+        )
+        assert response.status_code == 401
+    response = await client.post(
+        "/login/token", data=credentials, headers=attacker
+    )
+    assert response.status_code == 429
+
+    response = await client.post(
+        "/login/token",
+        data={"username": "nice@example.com", "password": "simple-password"},
+        headers={"X-Forwarded-For": "203.0.113.7"},
+    )
+
+    assert response.status_code == 200
+
+
+async def test_login_rehashes_weaker_password_hash(
+    client: AsyncClient, create_user_in_database, get_user_from_database
+):
+    user_id = uuid4()
+    PasswordHasher.configure(4)
+    weak_hash = PasswordHasher.get_password_hash("simple-password")
+    await create_user_in_database(
+        user_id=user_id,
+        name="Alex",
+        surname="Sokol",
+        email="nice@example.com",
+        is_active=True,
+        hashed_password=weak_hash,
+        roles=[PortalRole.USER],
+    )
+
+    PasswordHasher.configure(5)
+    try:
+        response = await client.post(
+            "/login/token",
+            data={
+                "username": "nice@example.com",
+                "password": "simple-password",
+            },
+        )
+    finally:
+        PasswordHasher.configure(None)
+
+    assert response.status_code == 200
+    [user] = await get_user_from_database(user_id)
+    assert user["hashed_password"].startswith("$2b$05$")
+    assert PasswordHasher.verify_password(
+        "simple-password", user["hashed_password"]
+    )
+
+
+async def test_verified_token_payload_is_cached(
+    client: AsyncClient, create_user_in_database, monkeypatch
+):
+    user_id = uuid4()
+    await create_user_in_database(
+        user_id=user_id,
+        name="Alex",
+        surname="Sokol",
+        email="nice@example.com",
+        is_active=True,
+        hashed_password="SampleHashedPass",
+        roles=[PortalRole.USER],
+    )
+    decoded_tokens = []
+
+    def _decode_access_token(token: str) -> dict:
+        decoded_tokens.append(token)
+        return decode_access_token(token)
+
+    monkeypatch.setattr(
+        "src.api.actions.auth.decode_access_token", _decode_access_token
+    )
+    headers = create_test_auth_header_for_user("nice@example.com")
+    for _ in range(3):
+        response = await client.get(
+            "/user/", params={"user_id": str(user_id)}, headers=headers
+        )
+        assert response.status_code == 200
+
+    response = await client.get(
+        "/user/",
+        params={"user_id": str(user_id)},
+        headers={"Authorization": headers["Authorization"] + "x"},
+    )
+    assert response.status_code == 401
+    assert len(decoded_tokens) == 2
+
+
+async def _create_user_and_get_tokens(client: AsyncClient) -> dict:
+    response = await client.post(
+        "/user/",
+        json={
+            "name": "Alex",
+            "surname": "Sokol",
+            "email": "nice@example.com",
+            "password": "simple-password",
+        },
+    )
+    assert response.status_code == 200
+    response = await client.post(
+        "/login/token",
+        data={"username": "nice@example.com", "password": "simple-password"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_refresh_token_rotation(client: AsyncClient):
+    tokens = await _create_user_and_get_tokens(client)
+
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 200
+    new_tokens = response.json()
+    assert new_tokens["token_type"] == "Bearer"
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+    response = await client.get(
+        "/user/by-email",
+        params={"email": "nice@example.com"},
+        headers={"Authorization": f"Bearer {new_tokens['access_token']}"},
+    )
+    assert response.status_code == 200
+
+
+async def test_refresh_token_reuse_revokes_all_tokens(client: AsyncClient):
+    tokens = await _create_user_and_get_tokens(client)
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    rotated_refresh_token = response.json()["refresh_token"]
+
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": rotated_refresh_token}
+    )
+    assert response.status_code == 401
+
+
+async def test_failed_rotation_keeps_refresh_token_usable(
+    client: AsyncClient, autocommit_session, monkeypatch
+):
+    tokens = await _create_user_and_get_tokens(client)
+
+    async def _create_token(self, token_hash, user_id, expires_at) -> None:
+        raise RuntimeError("insert failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(RefreshTokenDAL, "create_token", _create_token)
+        with pytest.raises(RuntimeError):
+            await rotate_refresh_token(
+                tokens["refresh_token"], autocommit_session
+            )
+
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+
+
+async def test_login_prunes_expired_refresh_tokens_of_all_users(
+    client: AsyncClient, asyncpg_pool
+):
+    await _create_user_and_get_tokens(client)
+    async with asyncpg_pool.acquire() as connection:
+        await connection.execute(
+            "UPDATE refresh_tokens SET revoked_at = now(), "
+            "expires_at = now() - interval '1 second'"
+        )
+
+    response = await client.post(
+        "/user/",
+        json={
+            "name": "Nick",
+            "surname": "Sokol",
+            "email": "other@example.com",
+            "password": "other-password",
+        },
+    )
+    assert response.status_code == 200
+    response = await client.post(
+        "/login/token",
+        data={"username": "other@example.com", "password": "other-password"},
+    )
+    assert response.status_code == 200
+
+    async with asyncpg_pool.acquire() as connection:
+        expired = await connection.fetchval(
+            "SELECT count(*) FROM refresh_tokens WHERE expires_at <= now()"
+        )
+        live = await connection.fetchval(
+            "SELECT count(*) FROM refresh_tokens WHERE expires_at > now()"
+        )
+    assert (expired, live) == (0, 1)
+
+
+async def test_token_types_are_not_interchangeable(client: AsyncClient):
+    tokens = await _create_user_and_get_tokens(client)
+
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["access_token"]}
+    )
+    assert response.status_code == 401
+
+    response = await client.get(
+        "/user/by-email",
+        params={"email": "nice@example.com"},
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+    assert response.status_code == 401
+
+
+async def test_revoke_refresh_tokens(client: AsyncClient):
+    tokens = await _create_user_and_get_tokens(client)
+    response = await client.post(
+        "/login/token",
+        data={"username": "nice@example.com", "password": "simple-password"},
+    )
+    other_refresh_token = response.json()["refresh_token"]
+
+    response = await client.post(
+        "/login/revoke",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"revoked": 2}
+    for refresh_token in (tokens["refresh_token"], other_refresh_token):
+        response = await client.post(
+            "/login/refresh", json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 401
+
+
+async def test_deleted_user_cannot_refresh(client: AsyncClient, asyncpg_pool):
+    tokens = await _create_user_and_get_tokens(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = await client.get(
+        "/user/by-email", params={"email": "nice@example.com"}, headers=headers
+    )
+
+    response = await client.delete(
+        "/user/",
+        params={"user_id": response.json()["user_id"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    async with asyncpg_pool.acquire() as connection:
+        revoked = await connection.fetchval(
+            "SELECT count(*) FROM refresh_tokens WHERE revoked_at IS NOT NULL"
+        )
+    assert revoked == 1
+    response = await client.post(
+        "/login/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
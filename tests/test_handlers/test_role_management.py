@@ -43,6 +43,7 @@ async def test_add_admin_role_to_user_by_superadmin(
     updated_user = dict(db_users[0])
     assert updated_user["user_id"] == user_to_promote["user_id"]
     assert PortalRole.ADMIN in updated_user["roles"]
+    assert updated_user["roles_mask"] == 3
 
 
 async def test_revoke_admin_role_from_user_by_superadmin(
@@ -82,6 +83,7 @@ async def test_revoke_admin_role_from_user_by_superadmin(
     revoked_user_from_dbs = dict(db_users[0])
     assert revoked_user_from_dbs["user_id"] == user_data_for_revoke["user_id"]
     assert PortalRole.ADMIN not in revoked_user_from_dbs["roles"]
+    assert revoked_user_from_dbs["roles_mask"] == 1
 
 
 @pytest.mark.parametrize(
@@ -140,3 +142,276 @@ async def test_prevent_unauthorized_admin_role_revocation(
     not_revoked_user_from_db = dict(not_revoked_user_from_db[0])
     assert not_revoked_user_from_db["user_id"] == user_to_revoke["user_id"]
     assert PortalRole.ADMIN in not_revoked_user_from_db["roles"]
+
+
+async def test_revoked_admin_loses_privileges_immediately(
+    client: AsyncClient, create_user_in_database
+):
+    superadmin = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.SUPERADMIN],
+    }
+    admin = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.USER, PortalRole.ADMIN],
+    }
+    user = {
+        "user_id": uuid4(),
+        "name": "Petr",
+        "surname": "Petrov",
+        "email": "petr@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.USER],
+    }
+    for user_data in [superadmin, admin, user]:
+        await create_user_in_database(**user_data)
+
+    resp = await client.get(
+        "/user/",
+        params={"user_id": user["user_id"]},
+        headers=create_test_auth_header_for_user(admin["email"]),
+    )
+    assert resp.status_code == 200
+
+    resp = await client.delete(
+        "/user/admin_privilege",
+        params={"user_id": admin["user_id"]},
+        headers=create_test_auth_header_for_user(superadmin["email"]),
+    )
+    assert resp.status_code == 200
+
+    resp = await client.delete(
+        "/user/",
+        params={"user_id": user["user_id"]},
+        headers=create_test_auth_header_for_user(admin["email"]),
+    )
+    assert resp.status_code == 403
+
+
+@pytest.mark.parametrize(
+    "method, target_user_roles, expected_detail",
+    (
+        pytest.param(
+            "PATCH",
+            [PortalRole.USER, PortalRole.ADMIN],
+            "already promoted to admin / superadmin.",
+            id="grant_to_admin",
+        ),
+        pytest.param(
+            "PATCH",
+            [PortalRole.SUPERADMIN],
+            "already promoted to admin / superadmin.",
+            id="grant_to_superadmin",
+        ),
+        pytest.param(
+            "DELETE",
+            [PortalRole.USER],
+            "has no admin privileges.",
+            id="revoke_from_user",
+        ),
+    ),
+)
+async def test_admin_privilege_conflict(
+    client: AsyncClient,
+    create_user_in_database,
+    get_user_from_database,
+    method,
+    target_user_roles,
+    expected_detail,
+):
+    superadmin = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.SUPERADMIN],
+    }
+    target_user = {
+        "user_id": uuid4(),
+        "name": "Nikolai",
+        "surname": "Sviridov",
+        "email": "lol@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": target_user_roles,
+    }
+    for user_data in [superadmin, target_user]:
+        await create_user_in_database(**user_data)
+
+    resp = await client.request(
+        method,
+        "/user/admin_privilege",
+        params={"user_id": target_user["user_id"]},
+        headers=create_test_auth_header_for_user(superadmin["email"]),
+    )
+
+    assert resp.status_code == 409
+    assert resp.json()["detail"].endswith(expected_detail)
+    db_users = await get_user_from_database(target_user["user_id"])
+    assert dict(db_users[0])["roles"] == target_user_roles
+
+
+async def test_admin_privilege_user_not_found(
+    client: AsyncClient, create_user_in_database
+):
+    superadmin = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.SUPERADMIN],
+    }
+    await create_user_in_database(**superadmin)
+    user_id = uuid4()
+
+    resp = await client.patch(
+        "/user/admin_privilege",
+        params={"user_id": user_id},
+        headers=create_test_auth_header_for_user(superadmin["email"]),
+    )
+
+    assert resp.status_code == 404
+    assert resp.json() == {"detail": f"User with id {user_id} not found."}
+
+
+def _build_user(email: str, roles: list[PortalRole], is_active=True) -> dict:
+    return {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": email,
+        "is_active": is_active,
+        "hashed_password": "SampleHashedPass",
+        "roles": roles,
+    }
+
+
+@pytest.mark.parametrize(
+    "method, updated_roles, failed_roles, failed_status",
+    (
+        pytest.param(
+            "PATCH",
+            [PortalRole.USER],
+            [PortalRole.USER, PortalRole.ADMIN],
+            "already_admin",
+            id="grant",
+        ),
+        pytest.param(
+            "DELETE",
+            [PortalRole.USER, PortalRole.ADMIN],
+            [PortalRole.USER],
+            "not_admin",
+            id="revoke",
+        ),
+    ),
+)
+async def test_admin_privilege_batch_outcomes(
+    client: AsyncClient,
+    create_user_in_database,
+    get_user_from_database,
+    method,
+    updated_roles,
+    failed_roles,
+    failed_status,
+):
+    superadmin = _build_user("root@kek.com", [PortalRole.SUPERADMIN])
+    updated = [
+        _build_user(f"user{index}@kek.com", updated_roles)
+        for index in range(2)
+    ]
+    failed = _build_user("failed@kek.com", failed_roles)
+    other_superadmin = _build_user(
+        "other-root@kek.com", [PortalRole.SUPERADMIN, PortalRole.ADMIN]
+    )
+    deleted = _build_user("deleted@kek.com", updated_roles, is_active=False)
+    for user_data in [superadmin, *updated, failed, other_superadmin, deleted]:
+        await create_user_in_database(**user_data)
+    missing_user_id = uuid4()
+    user_ids = [
+        updated[0]["user_id"],
+        failed["user_id"],
+        superadmin["user_id"],
+        other_superadmin["user_id"],
+        deleted["user_id"],
+        missing_user_id,
+        updated[1]["user_id"],
+        updated[0]["user_id"],
+    ]
+
+    response = await client.request(
+        method,
+        "/user/admin_privilege/batch",
+        json={"user_ids": [str(user_id) for user_id in user_ids]},
+        headers=create_test_auth_header_for_user(superadmin["email"]),
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 2,
+        "results": [
+            {"user_id": str(updated[0]["user_id"]), "status": "updated"},
+            {"user_id": str(failed["user_id"]), "status": failed_status},
+            {"user_id": str(superadmin["user_id"]), "status": "forbidden"},
+            {
+                "user_id": str(other_superadmin["user_id"]),
+                "status": "forbidden",
+            },
+            {"user_id": str(deleted["user_id"]), "status": "not_found"},
+            {"user_id": str(missing_user_id), "status": "not_found"},
+            {"user_id": str(updated[1]["user_id"]), "status": "updated"},
+        ],
+    }
+    for user_data in updated:
+        [db_user] = await get_user_from_database(user_data["user_id"])
+        assert (PortalRole.ADMIN in db_user["roles"]) is (method == "PATCH")
+    [db_user] = await get_user_from_database(other_superadmin["user_id"])
+    assert PortalRole.ADMIN in db_user["roles"]
+
+
+@pytest.mark.parametrize("method", ("PATCH", "DELETE"))
+async def test_admin_privilege_batch_requires_superadmin(
+    client: AsyncClient, create_user_in_database, method
+):
+    admin = _build_user("admin@kek.com", [PortalRole.USER, PortalRole.ADMIN])
+    target = _build_user("user@kek.com", [PortalRole.USER])
+    for user_data in [admin, target]:
+        await create_user_in_database(**user_data)
+
+    response = await client.request(
+        method,
+        "/user/admin_privilege/batch",
+        json={"user_ids": [str(target["user_id"])]},
+        headers=create_test_auth_header_for_user(admin["email"]),
+    )
+
+    assert response.status_code == 403
+
+
+async def test_admin_privilege_batch_rejects_empty_list(
+    client: AsyncClient, create_user_in_database
+):
+    superadmin = _build_user("root@kek.com", [PortalRole.SUPERADMIN])
+    await create_user_in_database(**superadmin)
+
+    response = await client.patch(
+        "/user/admin_privilege/batch",
+        json={"user_ids": []},
+        headers=create_test_auth_header_for_user(superadmin["email"]),
+    )
+
+    assert response.status_code == 422
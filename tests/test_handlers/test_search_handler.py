@@ -0,0 +1,269 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from src.db.dals import UserDAL
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+ADMIN_EMAIL = "admin@kek.com"
+
+
+async def _create_users(create_user_in_database, people) -> list[dict]:
+    users = []
+    for name, surname, email, is_active in [
+        ("Admin", "Adminov", ADMIN_EMAIL, True),
+        *people,
+    ]:
+        user_data = {
+            "user_id": uuid4(),
+            "name": name,
+            "surname": surname,
+            "email": email,
+            "hashed_password": "SampleHashPassword",
+            "is_active": is_active,
+            "roles": (
+                [PortalRole.USER, PortalRole.ADMIN]
+                if email == ADMIN_EMAIL
+                else [PortalRole.USER]
+            ),
+        }
+        await create_user_in_database(**user_data)
+        users.append(user_data)
+    return users
+
+
+async def test_search_users_ranks_exact_prefix_then_substring(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(
+        create_user_in_database,
+        [
+            ("Anna", "Petrovskaya", "anna@kek.com", True),
+            ("Ivan", "Petrov", "ivan@kek.com", True),
+            ("Oleg", "Sidorov", "petrov.fan@kek.com", True),
+            ("Maria", "Ivanova", "maria@kek.com", True),
+            ("Petr", "Kopetrova", "petr@kek.com", True),
+        ],
+    )
+
+    response = await client.get(
+        "/user/search",
+        params={"q": "  PETROV "},
+        headers=create_test_auth_header_for_user(ADMIN_EMAIL),
+    )
+
+    assert response.status_code == 200
+    found_ids = [user["user_id"] for user in response.json()["users"]]
+    assert found_ids[0] == str(users[2]["user_id"])
+    assert sorted(found_ids[1:3]) == sorted(
+        str(users[index]["user_id"]) for index in (1, 3)
+    )
+    assert found_ids[3:] == [str(users[5]["user_id"])]
+
+
+async def test_search_users_walks_all_pages(
+    client: AsyncClient, create_user_in_database
+):
+    users = await _create_users(
+        create_user_in_database,
+        [
+            ("Ivan", f"Smirnov{index}", f"user{index}@kek.com", True)
+            for index in range(7)
+        ],
+    )
+    headers = create_test_auth_header_for_user(ADMIN_EMAIL)
+
+    seen_ids = []
+    params = {"q": "smirnov", "limit": 3}
+    while True:
+        response = await client.get(
+            "/user/search", params=params, headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["users"]) <= 3
+        seen_ids.extend(user["user_id"] for user in data["users"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert seen_ids == sorted(str(user["user_id"]) for user in users[1:])
+
+
+async def test_search_users_pages_across_tiers(
+    client: AsyncClient, create_user_in_database
+):
+    await _create_users(
+        create_user_in_database,
+        [
+            ("Anna", "Petrovskaya", "anna@kek.com", True),
+            ("Ivan", "Petrov", "ivan@kek.com", True),
+            ("Oleg", "Sidorov", "petrov.fan@kek.com", True),
+            ("Petr", "Kopetrova", "petr@kek.com", True),
+            ("Maria", "Apetrov", "maria@kek.com", True),
+        ],
+    )
+    headers = create_test_auth_header_for_user(ADMIN_EMAIL)
+    response = await client.get(
+        "/user/search", params={"q": "petrov"}, headers=headers
+    )
+    expected_ids = [user["user_id"] for user in response.json()["users"]]
+
+    seen_ids = []
+    params = {"q": "petrov", "limit": 1}
+    while True:
+        response = await client.get(
+            "/user/search", params=params, headers=headers
+        )
+        data = response.json()
+        seen_ids.extend(user["user_id"] for user in data["users"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert len(expected_ids) == 5
+    assert seen_ids == expected_ids
+
+
+@pytest.mark.parametrize(
+    "params, expected_emails",
+    (
+        pytest.param({"q": "100%"}, ["sale100%@kek.com"], id="escapes_like"),
+        pytest.param(
+            {"q": "sidorov", "is_active": False},
+            ["old@kek.com"],
+            id="inactive_only",
+        ),
+    ),
+)
+async def test_search_users_filters(
+    client: AsyncClient, create_user_in_database, params, expected_emails
+):
+    await _create_users(
+        create_user_in_database,
+        [
+            ("Oleg", "Sidorov", "sale100%@kek.com", True),
+            ("Oleg", "Sidorov", "sale1000@kek.com", True),
+            ("Oleg", "Sidorov", "old@kek.com", False),
+        ],
+    )
+
+    response = await client.get(
+        "/user/search",
+        params=params,
+        headers=create_test_auth_header_for_user(ADMIN_EMAIL),
+    )
+
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()["users"]] == (
+        expected_emails
+    )
+
+
+@pytest.mark.parametrize(
+    "params",
+    (
+        pytest.param({"q": "iv"}, id="too_short"),
+        pytest.param({"q": "ivan", "cursor": "!!"}, id="invalid_cursor"),
+    ),
+)
+async def test_search_users_rejects_bad_params(
+    client: AsyncClient, create_user_in_database, params
+):
+    await _create_users(create_user_in_database, [])
+
+    response = await client.get(
+        "/user/search",
+        params=params,
+        headers=create_test_auth_header_for_user(ADMIN_EMAIL),
+    )
+
+    assert response.status_code == 422
+
+
+async def test_search_users_requires_admin(
+    client: AsyncClient, create_user_in_database
+):
+    await _create_users(
+        create_user_in_database, [("Ivan", "Petrov", "ivan@kek.com", True)]
+    )
+
+    response = await client.get(
+        "/user/search",
+        params={"q": "petrov"},
+        headers=create_test_auth_header_for_user("ivan@kek.com"),
+    )
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Forbidden."}
+
+
+async def test_fuzzy_search_finds_similar_users(
+    client: AsyncClient, create_user_in_database, session
+):
+    async with session.begin():
+        if not await UserDAL(session).has_trigram_support():
+            pytest.skip("pg_trgm is not installed")
+    users = await _create_users(
+        create_user_in_database,
+        [
+            ("Ivan", "Smirnova", "ivan@kek.com", True),
+            ("Anna", "Smirnov", "anna@kek.com", True),
+            ("Oleg", "Sidorov", "oleg@kek.com", True),
+        ],
+    )
+
+    response = await client.get(
+        "/user/search",
+        params={"q": "smirnow"},
+        headers=create_test_auth_header_for_user(ADMIN_EMAIL),
+    )
+
+    assert response.status_code == 200
+    assert [user["user_id"] for user in response.json()["users"]] == [
+        str(users[2]["user_id"]),
+        str(users[1]["user_id"]),
+    ]
+
+
+async def test_fuzzy_search_uses_trigram_operators(session, monkeypatch):
+    statements = []
+
+    async def execute(query):
+        statements.append(query)
+        raise RuntimeError
+
+    monkeypatch.setattr(session, "execute", execute)
+    with pytest.raises(RuntimeError):
+        # A cursor past the substring tier goes straight to similar users.
+        await UserDAL(session).search_users(
+            "petrov", limit=10, after=(3.5, uuid4()), fuzzy=True
+        )
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "lower(users.surname) %% " in sql
+    assert "lower(users.surname) <-> " in sql
+    assert "lower(users.email) %% " not in sql
+    # Only a bounded set of candidates is ever scored.
+    assert sql.count("LIMIT") == 2
+
+
+async def test_trigram_support_is_cached_per_engine(session, monkeypatch):
+    installed = (
+        await session.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+        )
+    ).scalar()
+    other_engine = create_engine("sqlite://")
+    monkeypatch.setitem(UserDAL._trigram_support, other_engine, not installed)
+
+    assert await UserDAL(session).has_trigram_support() is installed
+    engine = session.get_bind().engine
+    assert UserDAL._trigram_support[engine] is installed
+    assert UserDAL._trigram_support[other_engine] is not installed
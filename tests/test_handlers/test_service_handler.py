@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+
+async def test_ping(client: AsyncClient):
+    response = await client.get("/ping")
+
+    assert response.status_code == 200
+    assert response.json() == {"success": True}
+
+
+@pytest.mark.parametrize(
+    "url, expected_keys",
+    (
+        pytest.param(
+            "/debug/pool",
+            {"status", "checked_out", "checkout_wait_seconds", "replicas"},
+            id="pool",
+        ),
+        pytest.param(
+            "/debug/principal-cache",
+            {"size", "hits", "misses", "evictions"},
+            id="principal_cache",
+        ),
+        pytest.param(
+            "/debug/login-throttle", {"email", "ip"}, id="login_throttle"
+        ),
+    ),
+)
+@pytest.mark.parametrize(
+    "user_roles, expected_status",
+    (
+        pytest.param([PortalRole.USER, PortalRole.ADMIN], 200, id="admin"),
+        pytest.param([PortalRole.SUPERADMIN], 200, id="superadmin"),
+        pytest.param([PortalRole.USER], 403, id="regular_user"),
+    ),
+)
+async def test_debug_endpoints(
+    client: AsyncClient,
+    create_user_in_database,
+    url,
+    expected_keys,
+    user_roles,
+    expected_status,
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": user_roles,
+    }
+    await create_user_in_database(**user_data)
+
+    response = await client.get(
+        url, headers=create_test_auth_header_for_user(user_data["email"])
+    )
+
+    assert response.status_code == expected_status
+    if expected_status == 200:
+        assert expected_keys <= response.json().keys()
@@ -462,3 +462,104 @@ async def test_update_user_authentication_scenarios(
         assert response.json() == test_case["expected_response"](user_data)
     else:
         assert response.json() == test_case["expected_response"]
+
+
+@pytest.mark.parametrize(
+    "current_user_roles, target_user_roles, expected_status",
+    (
+        pytest.param(
+            [PortalRole.USER, PortalRole.ADMIN],
+            [PortalRole.USER],
+            200,
+            id="admin_updates_user",
+        ),
+        pytest.param(
+            [PortalRole.SUPERADMIN],
+            [PortalRole.USER, PortalRole.ADMIN],
+            200,
+            id="superadmin_updates_admin",
+        ),
+        pytest.param(
+            [PortalRole.USER],
+            [PortalRole.USER],
+            403,
+            id="user_cant_update_user",
+        ),
+        pytest.param(
+            [PortalRole.USER, PortalRole.ADMIN],
+            [PortalRole.USER, PortalRole.ADMIN],
+            403,
+            id="admin_cant_update_admin",
+        ),
+        pytest.param(
+            [PortalRole.USER, PortalRole.ADMIN],
+            [PortalRole.SUPERADMIN],
+            403,
+            id="admin_cant_update_superadmin",
+        ),
+    ),
+)
+async def test_update_another_user_by_roles(
+    client: AsyncClient,
+    create_user_in_database,
+    get_user_from_database,
+    current_user_roles,
+    target_user_roles,
+    expected_status,
+):
+    current_user = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": True,
+        "roles": current_user_roles,
+    }
+    target_user = {
+        "user_id": uuid4(),
+        "name": "Petr",
+        "surname": "Petrov",
+        "email": "petr@kek.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": True,
+        "roles": target_user_roles,
+    }
+    for user_data in [current_user, target_user]:
+        await create_user_in_database(**user_data)
+
+    response = await client.patch(
+        "/user/",
+        params={"user_id": target_user["user_id"]},
+        json={"name": "Oleg"},
+        headers=create_test_auth_header_for_user(current_user["email"]),
+    )
+
+    assert response.status_code == expected_status
+    db_users = await get_user_from_database(target_user["user_id"])
+    expected_name = "Oleg" if expected_status == 200 else "Petr"
+    assert dict(db_users[0])["name"] == expected_name
+
+
+async def test_update_inactive_user_not_found(
+    client: AsyncClient, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Michael",
+        "surname": "Jordan",
+        "email": "jordan@gmail.com",
+        "hashed_password": "SampleHashPassword",
+        "is_active": False,
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+
+    response = await client.patch(
+        "/user/",
+        params={"user_id": user_data["user_id"]},
+        json={"name": "Oleg"},
+        headers=create_test_auth_header_for_user(user_data["email"]),
+    )
+
+    assert response.status_code == 404
@@ -0,0 +1,72 @@
+import logging
+from uuid import uuid4
+
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.cache import principal_cache
+from src.config import settings
+from src.db.instrumentation import instrument_engine
+from src.db.models import PortalRole
+from tests.conftest import create_test_auth_header_for_user
+
+
+async def test_slow_queries_logged_without_parameters(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_THRESHOLD_MS", 0.001)
+    engine = create_async_engine(settings.TEST_DATABASE_URL)
+    instrument_engine(engine, "slow-query-test")
+
+    with caplog.at_level(logging.WARNING, logger="src.db.instrumentation"):
+        async with engine.connect() as connection:
+            await connection.execute(
+                text("SELECT :secret"), {"secret": "SampleHashedPass"}
+            )
+    await engine.dispose()
+
+    assert "Slow query on slow-query-test" in caplog.text
+    assert "1 parameters redacted" in caplog.text
+    assert "SampleHashedPass" not in caplog.text
+
+
+async def test_fast_queries_not_logged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_THRESHOLD_MS", 0)
+    engine = create_async_engine(settings.TEST_DATABASE_URL)
+    instrument_engine(engine, "fast-query-test")
+
+    with caplog.at_level(logging.WARNING, logger="src.db.instrumentation"):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    await engine.dispose()
+
+    assert "Slow query" not in caplog.text
+
+
+async def test_query_budget_warning(
+    client: AsyncClient, create_user_in_database, monkeypatch, caplog
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+    headers = create_test_auth_header_for_user(user_data["email"])
+    params = {"user_id": str(user_data["user_id"])}
+
+    with caplog.at_level(logging.WARNING, logger="src.db.instrumentation"):
+        response = await client.get("/user/", params=params, headers=headers)
+        assert response.status_code == 200
+        assert "over the budget" not in caplog.text
+
+        principal_cache.clear()
+        monkeypatch.setattr(settings, "DB_QUERY_BUDGET", 1)
+        response = await client.get("/user/", params=params, headers=headers)
+        assert response.status_code == 200
+
+    assert "GET /user/ ran 2 queries" in caplog.text
+    assert "over the budget of 1" in caplog.text
@@ -0,0 +1,121 @@
+from uuid import uuid4
+
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import settings
+from src.db.instrumentation import instrument_engine
+from src.db.models import PortalRole
+from src.db.pool import InstrumentedAsyncQueuePool
+from src.metrics import UNMATCHED_ROUTE
+from src.utils import PasswordHasher
+from tests.conftest import create_test_auth_header_for_user
+
+
+def _get_sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_metrics_record_route_templates(
+    client: AsyncClient, create_user_in_database
+):
+    user_data = {
+        "user_id": uuid4(),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+        "hashed_password": "SampleHashedPass",
+        "roles": [PortalRole.USER],
+    }
+    await create_user_in_database(**user_data)
+    labels = {"method": "GET", "route": "/user/"}
+    requests_before = _get_sample(
+        "http_requests_total", status="200", **labels
+    )
+    observed_before = _get_sample(
+        "http_request_duration_seconds_count", **labels
+    )
+
+    for _ in range(2):
+        response = await client.get(
+            "/user/",
+            params={"user_id": str(user_data["user_id"])},
+            headers=create_test_auth_header_for_user(user_data["email"]),
+        )
+        assert response.status_code == 200
+    await client.get("/no-such-route")
+
+    assert (
+        _get_sample("http_requests_total", status="200", **labels)
+        == requests_before + 2
+    )
+    assert (
+        _get_sample("http_request_duration_seconds_count", **labels)
+        == observed_before + 2
+    )
+    assert _get_sample(
+        "http_requests_total",
+        method="GET",
+        route=UNMATCHED_ROUTE,
+        status="404",
+    )
+
+
+async def test_metrics_endpoint_exposes_timers(client: AsyncClient):
+    await PasswordHasher.ahash_password("SamplePass1!")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+    assert "access_token_create_duration_seconds_count" in body
+    assert 'db_pool_checked_out{database="primary"}' in body
+    assert "# TYPE db_pool_checkout_timeouts_total counter" in body
+    assert 'db_pool_checkout_wait_seconds_total{database="primary"}' in body
+    assert "password_hash_pending 0.0" in body
+
+
+async def test_instrumented_engine_times_queries():
+    engine = create_async_engine(
+        settings.TEST_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool
+    )
+    instrument_engine(engine, "metrics-test")
+
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        await connection.execute(text("SHOW server_version"))
+        assert _get_sample("db_pool_checked_out", database="metrics-test") == 1
+    assert _get_sample("db_pool_checked_in", database="metrics-test") == 1
+    await engine.dispose()
+
+    assert (
+        _get_sample(
+            "db_query_duration_seconds_count",
+            database="metrics-test",
+            operation="select",
+        )
+        >= 1
+    )
+    assert (
+        _get_sample(
+            "db_query_duration_seconds_count",
+            database="metrics-test",
+            operation="other",
+        )
+        >= 1
+    )
+    assert _get_sample("db_pool_checked_out", database="metrics-test") == 0
+    assert (
+        _get_sample("db_pool_checkout_timeouts_total", database="metrics-test")
+        == 0
+    )
+    assert (
+        _get_sample(
+            "db_pool_checkout_wait_seconds_total", database="metrics-test"
+        )
+        >= 0
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import settings
+from src.db.pool import InstrumentedAsyncQueuePool, get_pool_stats
+
+
+async def test_instrumented_pool_tracks_checkouts():
+    engine = create_async_engine(
+        settings.TEST_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        stats = get_pool_stats(engine.pool)
+        assert stats["checked_out"] == 1
+
+    stats = get_pool_stats(engine.pool)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["checkout_wait_seconds"] > 0
+    await engine.dispose()
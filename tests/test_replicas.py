@@ -0,0 +1,146 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.config import settings
+from src.db import database
+from src.db.pool import InstrumentedAsyncQueuePool, get_pool_stats
+from src.db.replicas import Replica, ReplicaSet
+
+
+def _create_engine():
+    return create_async_engine(
+        settings.TEST_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool
+    )
+
+
+def _create_request(cookies: dict[str, str] | None = None) -> Request:
+    cookie = "; ".join(
+        f"{key}={value}" for key, value in (cookies or {}).items()
+    )
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"cookie", cookie.encode())] if cookie else [],
+        }
+    )
+
+
+@pytest.fixture
+async def replicas(monkeypatch):
+    primary = _create_engine()
+    replica_set = ReplicaSet([Replica(_create_engine())], retry_seconds=30)
+    monkeypatch.setattr(
+        database, "async_session_maker", database.async_sessionmaker(primary)
+    )
+    monkeypatch.setattr(database, "replica_set", replica_set)
+
+    yield primary, replica_set
+
+    await primary.dispose()
+    await replica_set.dispose()
+
+
+async def _run_read(request: Request) -> None:
+    generator = database.get_db_read_session(request)
+    session = await anext(generator)
+    await session.execute(text("SELECT 1"))
+    with pytest.raises(StopAsyncIteration):
+        await anext(generator)
+
+
+def test_replica_set_round_robins_over_healthy_replicas():
+    first, second, third = (Replica(_create_engine()) for _ in range(3))
+    replica_set = ReplicaSet([first, second, third], retry_seconds=30)
+
+    replica_set.mark_unhealthy(second)
+
+    assert [replica_set.choose() for _ in range(4)] == [
+        first,
+        third,
+        third,
+        first,
+    ]
+    assert second.failures == 1
+    assert [stats["healthy"] for stats in replica_set.stats()] == [
+        True,
+        False,
+        True,
+    ]
+
+
+def test_replica_set_without_healthy_replicas():
+    replica = Replica(_create_engine())
+    replica_set = ReplicaSet([replica], retry_seconds=30)
+
+    assert ReplicaSet([], retry_seconds=30).choose() is None
+    replica_set.mark_unhealthy(replica)
+    assert replica_set.choose() is None
+
+    replica.unhealthy_until = time.monotonic() - 1
+    assert replica_set.choose() is replica
+
+
+async def test_read_session_uses_replica(replicas):
+    primary, replica_set = replicas
+
+    await _run_read(_create_request())
+
+    assert get_pool_stats(primary.pool)["checkouts"] == 0
+    assert (
+        get_pool_stats(replica_set.replicas[0].engine.pool)["checkouts"] == 1
+    )
+
+
+async def test_read_session_pinned_to_primary_after_write(replicas):
+    primary, replica_set = replicas
+    response = Response()
+
+    database.mark_primary_reads(response)
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{database.READ_PRIMARY_COOKIE}=")
+
+    pinned_until = cookie.split(";")[0].split("=")[1]
+    await _run_read(
+        _create_request({database.READ_PRIMARY_COOKIE: pinned_until})
+    )
+    await _run_read(
+        _create_request({database.READ_PRIMARY_COOKIE: str(time.time() - 1)})
+    )
+
+    assert get_pool_stats(primary.pool)["checkouts"] == 1
+    assert (
+        get_pool_stats(replica_set.replicas[0].engine.pool)["checkouts"] == 1
+    )
+
+
+async def test_read_session_marks_failed_replica_unhealthy(replicas):
+    primary, replica_set = replicas
+    replica = replica_set.replicas[0]
+
+    generator = database.get_db_read_session(_create_request())
+    await anext(generator)
+    with pytest.raises(OperationalError):
+        await generator.athrow(
+            OperationalError("SELECT 1", {}, ConnectionError())
+        )
+
+    assert not replica.is_healthy
+    await _run_read(_create_request())
+    assert get_pool_stats(primary.pool)["checkouts"] == 1
+
+
+def test_mark_primary_reads_without_replicas(monkeypatch):
+    monkeypatch.setattr(database, "replica_set", ReplicaSet([], 30))
+    response = Response()
+
+    database.mark_primary_reads(response)
+
+    assert "set-cookie" not in response.headers
@@ -0,0 +1,114 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.schemas import Principal
+from src.db.dals import UserDAL, manageable_by
+from src.db.models import PortalRole, UserEntity, get_roles_mask
+
+
+@pytest.mark.parametrize(
+    "roles, expected_mask",
+    [
+        ([], 0),
+        ([PortalRole.USER], 1),
+        ([PortalRole.USER, PortalRole.ADMIN], 3),
+        (["SUPERADMIN"], 4),
+        (["USER", "UNKNOWN"], 1),
+    ],
+)
+def test_get_roles_mask(roles, expected_mask):
+    assert get_roles_mask(roles) == expected_mask
+
+
+def test_principal_fills_roles_mask_from_roles():
+    principal = Principal(
+        user_id=uuid4(), email="ivan@kek.com", roles=["USER", "ADMIN"]
+    )
+
+    assert principal.roles_mask == 3
+    assert principal.is_admin
+    assert not principal.is_superadmin
+
+
+def test_principal_reads_roles_mask_from_entity():
+    user = UserEntity(
+        user_id=uuid4(),
+        name="Ivan",
+        surname="Ivanov",
+        email="ivan@kek.com",
+        is_active=True,
+        hashed_password="SampleHashedPass",
+        roles=[PortalRole.SUPERADMIN],
+    )
+
+    principal = Principal.model_validate(user)
+
+    assert user.roles_mask == 4
+    assert principal.is_superadmin
+    assert not principal.is_admin
+
+
+def test_manageable_by_regular_user_matches_nothing():
+    (condition,) = manageable_by(get_roles_mask([PortalRole.USER]))
+
+    assert str(condition) == "false"
+
+
+async def test_trigger_keeps_roles_mask_in_sync(
+    session: AsyncSession, create_user_in_database, get_user_from_database
+):
+    user_id = uuid4()
+    await create_user_in_database(
+        user_id=user_id,
+        name="Ivan",
+        surname="Ivanov",
+        email="ivan@kek.com",
+        is_active=True,
+        hashed_password="SampleHashedPass",
+        roles=[PortalRole.USER],
+    )
+    assert (await get_user_from_database(user_id))[0]["roles_mask"] == 1
+
+    async with session.begin():
+        await UserDAL(session).add_user_role(
+            user_id, PortalRole.ADMIN, excluded_roles=[PortalRole.ADMIN]
+        )
+    assert (await get_user_from_database(user_id))[0]["roles_mask"] == 3
+
+    async with session.begin():
+        await UserDAL(session).remove_user_role(user_id, PortalRole.USER)
+    assert (await get_user_from_database(user_id))[0]["roles_mask"] == 2
+
+
+async def test_role_filter_uses_roles_mask(
+    session: AsyncSession, create_user_in_database
+):
+    admin_id, user_id = uuid4(), uuid4()
+    for user_id_, email, roles in [
+        (admin_id, "admin@kek.com", [PortalRole.USER, PortalRole.ADMIN]),
+        (user_id, "user@kek.com", [PortalRole.USER]),
+    ]:
+        await create_user_in_database(
+            user_id=user_id_,
+            name="Ivan",
+            surname="Ivanov",
+            email=email,
+            is_active=True,
+            hashed_password="SampleHashedPass",
+            roles=roles,
+        )
+
+    users = await UserDAL(session).get_users_page(
+        limit=10, role=PortalRole.ADMIN
+    )
+    result = await session.execute(
+        select(UserEntity.user_id).where(
+            ~UserEntity.has_role(PortalRole.ADMIN)
+        )
+    )
+
+    assert [user.user_id for user in users] == [admin_id]
+    assert result.scalars().all() == [user_id]
@@ -0,0 +1,68 @@
+import json
+from uuid import uuid4
+
+from fastapi import Response
+
+from main import app
+from src.api.schemas import UserListResponse, UserShowResponse
+from src.api.serialization import get_type_adapter, render
+from src.config import settings
+from src.db.models import PortalRole, UserEntity
+
+
+def _build_user() -> UserEntity:
+    return UserEntity(
+        user_id=uuid4(),
+        name="Ivan",
+        surname="Ivanov",
+        email="ivan@kek.com",
+        is_active=True,
+        hashed_password="SampleHashedPass",
+        roles=[PortalRole.USER],
+    )
+
+
+def test_render_encodes_orm_objects(monkeypatch):
+    monkeypatch.setattr(settings, "APP_FAST_JSON", True)
+    user = _build_user()
+
+    response = render(UserShowResponse, user, status_code=201)
+
+    assert isinstance(response, Response)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {
+        "user_id": str(user.user_id),
+        "name": "Ivan",
+        "surname": "Ivanov",
+        "email": "ivan@kek.com",
+        "is_active": True,
+    }
+
+
+def test_render_encodes_validated_models(monkeypatch):
+    monkeypatch.setattr(settings, "APP_FAST_JSON", True)
+    users_page = UserListResponse(users=[_build_user()], next_cursor="abc")
+
+    response = render(UserListResponse, users_page)
+
+    assert json.loads(response.body) == users_page.model_dump(mode="json")
+
+
+def test_render_disabled_returns_content(monkeypatch):
+    monkeypatch.setattr(settings, "APP_FAST_JSON", False)
+    user = _build_user()
+
+    assert render(UserShowResponse, user) is user
+
+
+def test_type_adapters_are_cached():
+    assert get_type_adapter(UserShowResponse) is get_type_adapter(
+        UserShowResponse
+    )
+
+
+def test_response_schema_keeps_email_format():
+    schema = app.openapi()["components"]["schemas"]["UserShowResponse"]
+
+    assert schema["properties"]["email"]["format"] == "email"
@@ -0,0 +1,216 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from src import server
+from src.config import settings
+from src.db.pool import get_pool_limits
+from src.metrics import MULTIPROC_DIR_ENV
+
+
+@pytest.mark.parametrize(
+    "budget, workers, expected_limits",
+    (
+        pytest.param(0, 8, (5, 10), id="no_budget"),
+        pytest.param(96, 8, (5, 7), id="overflow_from_budget"),
+        pytest.param(16, 8, (2, 0), id="budget_below_pool_size"),
+        pytest.param(4, 8, (1, 0), id="at_least_one_connection"),
+    ),
+)
+def test_get_pool_limits(budget, workers, expected_limits):
+    assert get_pool_limits(5, 10, budget, workers) == expected_limits
+
+
+def test_workers_count(monkeypatch):
+    monkeypatch.setattr(settings, "APP_WORKERS", 3)
+
+    monkeypatch.setattr(settings, "APP_MODE", "dev")
+    assert settings.APP_WORKERS_COUNT == 1
+
+    monkeypatch.setattr(settings, "APP_MODE", "prod")
+    assert settings.APP_WORKERS_COUNT == 3
+
+    monkeypatch.setattr(settings, "APP_WORKERS", 0)
+    assert settings.APP_WORKERS_COUNT == (os.cpu_count() or 1)
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_prod_mode_serves_from_workers_and_drains_on_sigterm():
+    port = _get_free_port()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env={
+            **os.environ,
+            "APP_MODE": "prod",
+            "APP_WORKERS": "2",
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(port),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/ping")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, process.stderr.read()
+                time.sleep(0.1)
+        assert response.json() == {"success": True}
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+        assert process.stderr.read().count("Finished server process") == 2
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_prod_mode_reports_metrics_of_all_workers(tmp_path):
+    stale = tmp_path / "counter_1.db"
+    stale.write_bytes(b"")
+    port = _get_free_port()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env={
+            **os.environ,
+            "APP_MODE": "prod",
+            "APP_WORKERS": "2",
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(port),
+            MULTIPROC_DIR_ENV: str(tmp_path),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/ping")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, process.stderr.read()
+                time.sleep(0.1)
+        # A new connection per request spreads them over both workers.
+        for _ in range(19):
+            httpx.get(f"http://127.0.0.1:{port}/ping")
+
+        assert not stale.exists()
+        sample = (
+            'http_requests_total{method="GET",route="/ping",status="200"} 20.0'
+        )
+        for _ in range(5):
+            assert sample in httpx.get(f"http://127.0.0.1:{port}/metrics").text
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.fixture
+def restore_signal_handlers():
+    handlers = {
+        signum: signal.getsignal(signum)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def _fork_worker(target):
+    def _spawn_worker(app, sock) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+        try:
+            target()
+        finally:
+            os._exit(1)
+
+    return _spawn_worker
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_supervisor_kills_hung_workers_after_graceful_timeout(
+    monkeypatch, restore_signal_handlers
+):
+    def _hang():
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        time.sleep(60)
+
+    monkeypatch.setattr(server, "_spawn_worker", _fork_worker(_hang))
+    monkeypatch.setattr(settings, "APP_GRACEFUL_TIMEOUT_SECONDS", 0.3)
+    threading.Timer(0.3, os.kill, (os.getpid(), signal.SIGTERM)).start()
+
+    started_at = time.monotonic()
+    server._supervise(None, socket.socket(), 2)
+
+    assert time.monotonic() - started_at < 5
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_supervisor_gives_up_on_crash_loop(
+    monkeypatch, restore_signal_handlers
+):
+    spawned = []
+
+    def _spawn_worker(app, sock) -> int:
+        pid = _fork_worker(lambda: None)(app, sock)
+        spawned.append(pid)
+        return pid
+
+    monkeypatch.setattr(server, "_spawn_worker", _spawn_worker)
+    monkeypatch.setattr(server, "RESPAWN_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(server, "MAX_FAST_CRASHES", 3)
+
+    with pytest.raises(SystemExit) as exc_info:
+        server._supervise(None, socket.socket(), 1)
+
+    assert exc_info.value.code == 1
+    assert len(spawned) == 4
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_supervisor_marks_reaped_workers_dead(
+    monkeypatch, restore_signal_handlers, tmp_path
+):
+    spawned = []
+    dead = []
+
+    def _spawn_worker(app, sock) -> int:
+        pid = _fork_worker(lambda: None)(app, sock)
+        spawned.append(pid)
+        return pid
+
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+    monkeypatch.setattr(server, "_spawn_worker", _spawn_worker)
+    monkeypatch.setattr(server, "RESPAWN_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(server, "MAX_FAST_CRASHES", 1)
+    monkeypatch.setattr(server.multiprocess, "mark_process_dead", dead.append)
+
+    with pytest.raises(SystemExit):
+        server._supervise(None, socket.socket(), 1)
+
+    assert dead == spawned
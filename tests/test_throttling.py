@@ -0,0 +1,100 @@
+import pytest
+
+from src.throttling import LoginThrottle, TokenBucketLimiter
+
+
+def test_token_bucket_refills_over_window():
+    limiter = TokenBucketLimiter(capacity=2, window_seconds=60, maxsize=10)
+
+    limiter.consume("key", now=0)
+    limiter.consume("key", now=0)
+
+    assert limiter.get_retry_after("key", now=0) == pytest.approx(30)
+    assert limiter.get_retry_after("key", now=20) == pytest.approx(10)
+    assert limiter.get_retry_after("key", now=30) == 0
+    assert limiter.get_retry_after("other", now=0) == 0
+
+
+def test_token_bucket_bounds_keys():
+    limiter = TokenBucketLimiter(capacity=1, window_seconds=60, maxsize=2)
+
+    for key in ("first", "second", "third"):
+        limiter.consume(key, now=0)
+
+    assert len(limiter) == 2
+    assert limiter.get_retry_after("first", now=0) == 0
+    assert limiter.stats()["evictions"] == 1
+
+
+def test_token_bucket_evicts_idle_keys():
+    limiter = TokenBucketLimiter(capacity=1, window_seconds=60, maxsize=10)
+    limiter.consume("idle", now=0)
+    limiter.consume("active", now=30)
+
+    limiter.evict_idle(now=60)
+
+    assert len(limiter) == 1
+    assert limiter.get_retry_after("active", now=60) > 0
+
+
+def test_disabled_limiter_keeps_no_state():
+    limiter = TokenBucketLimiter(capacity=0, window_seconds=60, maxsize=10)
+
+    limiter.consume("key", now=0)
+
+    assert limiter.get_retry_after("key", now=0) == 0
+    assert len(limiter) == 0
+
+
+def test_login_throttle_limits_failures_per_email_and_ip(monkeypatch):
+    monkeypatch.setattr("src.throttling.time.monotonic", lambda: 1000.0)
+    throttle = LoginThrottle(
+        attempts_per_email=2,
+        attempts_per_ip=100,
+        window_seconds=60,
+        maxsize=10,
+        sweep_interval_seconds=60,
+    )
+
+    for _ in range(2):
+        assert throttle.acquire("Lol@Kek.com", "10.0.0.1") == 0
+        throttle.record_failure("Lol@Kek.com", "10.0.0.1")
+
+    assert throttle.acquire("LOL@kek.com", "10.0.0.1") > 0
+    assert throttle.acquire("lol@kek.com", "10.0.0.2") == 0
+    assert throttle.stats()["email"]["rejected"] == 1
+
+
+def test_login_throttle_success_forgives_failures(monkeypatch):
+    monkeypatch.setattr("src.throttling.time.monotonic", lambda: 1000.0)
+    throttle = LoginThrottle(
+        attempts_per_email=2,
+        attempts_per_ip=100,
+        window_seconds=60,
+        maxsize=10,
+        sweep_interval_seconds=60,
+    )
+
+    throttle.record_failure("lol@kek.com", "10.0.0.1")
+    throttle.record_success("lol@kek.com", "10.0.0.1")
+    throttle.record_failure("lol@kek.com", "10.0.0.1")
+
+    assert throttle.acquire("lol@kek.com", "10.0.0.1") == 0
+
+
+def test_login_throttle_limits_all_attempts_per_ip(monkeypatch):
+    monkeypatch.setattr("src.throttling.time.monotonic", lambda: 1000.0)
+    throttle = LoginThrottle(
+        attempts_per_email=2,
+        attempts_per_ip=3,
+        window_seconds=60,
+        maxsize=10,
+        sweep_interval_seconds=60,
+    )
+
+    assert throttle.acquire("first@kek.com", "10.0.0.4") == 0
+    assert throttle.acquire("second@kek.com", "10.0.0.4") == 0
+    assert throttle.acquire("third@kek.com", "10.0.0.4") == 0
+    assert throttle.acquire("fourth@kek.com", "10.0.0.4") > 0
+    assert throttle.acquire("fourth@kek.com", "10.0.0.5") == 0
+    assert throttle.stats()["ip"]["rejected"] == 1
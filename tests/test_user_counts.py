@@ -0,0 +1,82 @@
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.dals import UserDAL
+from src.db.models import PortalRole
+
+
+async def _counts(session: AsyncSession) -> dict:
+    async with session.begin():
+        user_dal = UserDAL(session)
+        return {
+            "all": await user_dal.get_maintained_users_count(),
+            "active": await user_dal.get_maintained_users_count(
+                is_active=True
+            ),
+            "admins": await user_dal.get_maintained_users_count(
+                role=PortalRole.ADMIN
+            ),
+        }
+
+
+async def test_maintained_counts_follow_writes(
+    session: AsyncSession, create_user_in_database
+):
+    user_ids = [uuid4() for _ in range(4)]
+    for index, user_id in enumerate(user_ids):
+        await create_user_in_database(
+            user_id=user_id,
+            name="Ivan",
+            surname="Ivanov",
+            email=f"user{index}@kek.com",
+            is_active=True,
+            hashed_password="SampleHashedPass",
+            roles=[PortalRole.USER],
+        )
+    assert await _counts(session) == {"all": 4, "active": 4, "admins": 0}
+
+    async with session.begin():
+        user_dal = UserDAL(session)
+        await user_dal.add_users_role(
+            user_ids[:2], PortalRole.ADMIN, excluded_roles=[PortalRole.ADMIN]
+        )
+        await user_dal.delete_user(user_ids[0])
+        await user_dal.update_user(user_ids[1], {"name": "Petr"})
+    assert await _counts(session) == {"all": 4, "active": 3, "admins": 2}
+
+    async with session.begin():
+        await session.execute(
+            text("DELETE FROM users WHERE user_id = :user_id"),
+            {"user_id": user_ids[3]},
+        )
+    assert await _counts(session) == {"all": 3, "active": 2, "admins": 2}
+
+    async with session.begin():
+        await session.execute(text("TRUNCATE TABLE users CASCADE"))
+    assert await _counts(session) == {"all": 0, "active": 0, "admins": 0}
+
+
+async def test_count_modes_agree_after_analyze(
+    session: AsyncSession, create_user_in_database
+):
+    for index in range(5):
+        await create_user_in_database(
+            user_id=uuid4(),
+            name="Ivan",
+            surname="Ivanov",
+            email=f"user{index}@kek.com",
+            is_active=index != 0,
+            hashed_password="SampleHashedPass",
+            roles=[PortalRole.USER],
+        )
+    await session.execute(text("ANALYZE users"))
+    await session.commit()
+
+    user_dal = UserDAL(session)
+    assert await user_dal.count_users() == 5
+    assert await user_dal.estimate_users_count() == 5
+    assert await user_dal.count_users(is_active=True) == 4
+    assert await user_dal.estimate_users_count(is_active=True) >= 1
+    await session.commit()
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from ipaddress import ip_network
+
+import pytest
+
+from src.config import auth_settings
+from src.utils import PasswordHasher, PasswordHasherBusyError, get_client_ip
+
+
+async def test_async_hash_and_verify_password():
+    hashed_password = await PasswordHasher.ahash_password("SamplePass1!")
+
+    assert hashed_password != "SamplePass1!"
+    assert await PasswordHasher.averify_password(
+        "SamplePass1!", hashed_password
+    )
+    assert not await PasswordHasher.averify_password(
+        "WrongPass", hashed_password
+    )
+
+
+async def test_password_hasher_rejects_when_saturated(monkeypatch):
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+
+    first_hash = asyncio.create_task(PasswordHasher.ahash_password("pass"))
+    await asyncio.sleep(0)
+
+    assert PasswordHasher.is_saturated()
+    with pytest.raises(PasswordHasherBusyError):
+        await PasswordHasher.ahash_password("pass")
+
+    await first_hash
+    assert not PasswordHasher.is_saturated()
+    assert PasswordHasher.stats()["rejected"] >= 1
+
+
+@pytest.fixture
+def restore_password_context():
+    yield
+    PasswordHasher.configure(None)
+
+
+@pytest.mark.parametrize(
+    "target_ms, expected_rounds",
+    (
+        pytest.param(0, 4, id="floor"),
+        pytest.param(60_000, 6, id="ceiling"),
+    ),
+)
+def test_calibrate_rounds_within_bounds(
+    monkeypatch, restore_password_context, target_ms, expected_rounds
+):
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_TARGET_MS", target_ms)
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_MIN_ROUNDS", 4)
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_MAX_ROUNDS", 6)
+
+    assert PasswordHasher.calibrate() == expected_rounds
+    assert PasswordHasher.get_password_hash("pass").startswith(
+        f"$2b$0{expected_rounds}$"
+    )
+
+
+def test_calibrate_uses_fixed_rounds(monkeypatch, restore_password_context):
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_ROUNDS", 5)
+
+    assert PasswordHasher.calibrate() == 5
+    assert PasswordHasher.stats()["rounds"] == 5
+
+
+async def test_verify_and_update_upgrades_weaker_hashes(
+    restore_password_context,
+):
+    PasswordHasher.configure(4)
+    weak_hash = await PasswordHasher.ahash_password("pass")
+
+    PasswordHasher.configure(5)
+    assert await PasswordHasher.averify_and_update("wrong", weak_hash) == (
+        False,
+        None,
+    )
+    is_valid, new_hash = await PasswordHasher.averify_and_update(
+        "pass", weak_hash
+    )
+    assert is_valid
+    assert new_hash.startswith("$2b$05$")
+    assert await PasswordHasher.averify_and_update("pass", new_hash) == (
+        True,
+        None,
+    )
+
+    PasswordHasher.configure(4)
+    assert await PasswordHasher.averify_and_update("pass", new_hash) == (
+        True,
+        None,
+    )
+
+
+async def test_timed_out_hash_stays_pending_until_done(monkeypatch):
+    monkeypatch.setattr(auth_settings, "PASSWORD_HASH_TIMEOUT_SECONDS", 0.05)
+
+    with pytest.raises(PasswordHasherBusyError):
+        await PasswordHasher._run(time.sleep, 0.3)
+
+    assert PasswordHasher._pending == 1
+    await asyncio.sleep(0.5)
+    assert PasswordHasher._pending == 0
+
+
+TRUSTED_PROXIES = [ip_network("10.0.0.0/8"), ip_network("::1/128")]
+
+
+@pytest.mark.parametrize(
+    "peer, forwarded_for, expected_ip",
+    (
+        pytest.param("203.0.113.7", None, "203.0.113.7", id="direct"),
+        pytest.param(
+            "203.0.113.7", "198.51.100.1", "203.0.113.7", id="untrusted_peer"
+        ),
+        pytest.param(
+            "10.0.0.2", "198.51.100.1", "198.51.100.1", id="one_proxy"
+        ),
+        pytest.param(
+            "10.0.0.2",
+            "1.2.3.4, 198.51.100.1, 10.0.0.3",
+            "198.51.100.1",
+            id="spoofed_prefix_and_proxy_chain",
+        ),
+        pytest.param("::1", "10.0.0.3", "10.0.0.3", id="only_proxies"),
+        pytest.param("10.0.0.2", "", "10.0.0.2", id="empty_header"),
+    ),
+)
+def test_get_client_ip(peer, forwarded_for, expected_ip):
+    assert get_client_ip(peer, forwarded_for, TRUSTED_PROXIES) == expected_ip